@@ -79,15 +79,398 @@ INSTRUCTIONS TO STUDENTS
 """
 
 import chess
-from chessboard import display
+import chess.polyglot
+from opening_book import OpeningBook
+import itertools
+import os
+import threading
 import time
 
+# Zobrist keys use Polyglot's random numbers and layout, so a position hashes
+# to the same 64-bit key as chess.polyglot.zobrist_hash() would give it.
+ZOBRIST = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+
+
+# Piece values in centipawns (a pawn is 100) and piece-square tables giving
+# a bonus or penalty for where a piece stands. Tables are drawn from White's
+# side, rank 8 at the top; Black uses the mirrored square. The central
+# squares score well here, which covers center control.
+PIECE_VALUES = {chess.PAWN: 100, chess.KNIGHT: 300, chess.BISHOP: 300,
+                chess.ROOK: 500, chess.QUEEN: 900, chess.KING: 0}
+
+PST_TABLES = {
+    chess.PAWN: [
+         0,   0,   0,   0,   0,   0,   0,   0,
+        50,  50,  50,  50,  50,  50,  50,  50,
+        10,  10,  20,  30,  30,  20,  10,  10,
+         5,   5,  10,  25,  25,  10,   5,   5,
+         0,   0,   0,  20,  20,   0,   0,   0,
+         5,  -5, -10,   0,   0, -10,  -5,   5,
+         5,  10,  10, -20, -20,  10,  10,   5,
+         0,   0,   0,   0,   0,   0,   0,   0],
+    chess.KNIGHT: [
+       -50, -40, -30, -30, -30, -30, -40, -50,
+       -40, -20,   0,   0,   0,   0, -20, -40,
+       -30,   0,  10,  15,  15,  10,   0, -30,
+       -30,   5,  15,  20,  20,  15,   5, -30,
+       -30,   0,  15,  20,  20,  15,   0, -30,
+       -30,   5,  10,  15,  15,  10,   5, -30,
+       -40, -20,   0,   5,   5,   0, -20, -40,
+       -50, -40, -30, -30, -30, -30, -40, -50],
+    chess.BISHOP: [
+       -20, -10, -10, -10, -10, -10, -10, -20,
+       -10,   0,   0,   0,   0,   0,   0, -10,
+       -10,   0,   5,  10,  10,   5,   0, -10,
+       -10,   5,   5,  10,  10,   5,   5, -10,
+       -10,   0,  10,  10,  10,  10,   0, -10,
+       -10,  10,  10,  10,  10,  10,  10, -10,
+       -10,   5,   0,   0,   0,   0,   5, -10,
+       -20, -10, -10, -10, -10, -10, -10, -20],
+    chess.ROOK: [
+         0,   0,   0,   0,   0,   0,   0,   0,
+         5,  10,  10,  10,  10,  10,  10,   5,
+        -5,   0,   0,   0,   0,   0,   0,  -5,
+        -5,   0,   0,   0,   0,   0,   0,  -5,
+        -5,   0,   0,   0,   0,   0,   0,  -5,
+        -5,   0,   0,   0,   0,   0,   0,  -5,
+        -5,   0,   0,   0,   0,   0,   0,  -5,
+         0,   0,   0,   5,   5,   0,   0,   0],
+    chess.QUEEN: [
+       -20, -10, -10,  -5,  -5, -10, -10, -20,
+       -10,   0,   0,   0,   0,   0,   0, -10,
+       -10,   0,   5,   5,   5,   5,   0, -10,
+        -5,   0,   5,   5,   5,   5,   0,  -5,
+         0,   0,   5,   5,   5,   5,   0,  -5,
+       -10,   5,   5,   5,   5,   5,   0, -10,
+       -10,   0,   5,   0,   0,   0,   0, -10,
+       -20, -10, -10,  -5,  -5, -10, -10, -20],
+    chess.KING: [
+       -30, -40, -40, -50, -50, -40, -40, -30,
+       -30, -40, -40, -50, -50, -40, -40, -30,
+       -30, -40, -40, -50, -50, -40, -40, -30,
+       -30, -40, -40, -50, -50, -40, -40, -30,
+       -20, -30, -30, -40, -40, -30, -30, -20,
+       -10, -20, -20, -20, -20, -20, -20, -10,
+        20,  20,   0,   0,   0,   0,  20,  20,
+        20,  30,  10,   0,   0,  10,  30,  20],
+}
+
+# PIECE_SQUARE[white][piece_type][square]: value + table bonus, signed so
+# that White's pieces count positive and Black's negative
+PIECE_SQUARE = {
+    white: {
+        piece_type: [
+            (1 if white else -1) * (PIECE_VALUES[piece_type] + table[(square if white else square ^ 56) ^ 56])
+            for square in chess.SQUARES
+        ]
+        for piece_type, table in PST_TABLES.items()
+    }
+    for white in (False, True)
+}
+
+
+def _square_terms(board, square):
+    # Zobrist key and material/piece-square score of whatever stands on square
+    piece_type = board.piece_type_at(square)
+    if piece_type is None:
+        return 0, 0
+    white = bool(board.occupied_co[chess.WHITE] & chess.BB_SQUARES[square])
+    return ZOBRIST[64 * ((piece_type - 1) * 2 + white) + square], PIECE_SQUARE[white][piece_type][square]
+
+
+def _state_key(board):
+    # Castling rights, en passant file and side to move, hashed the Polyglot way
+    key = 0
+    rights = board.clean_castling_rights()
+    if rights & chess.BB_H1:
+        key ^= ZOBRIST[768]
+    if rights & chess.BB_A1:
+        key ^= ZOBRIST[769]
+    if rights & chess.BB_H8:
+        key ^= ZOBRIST[770]
+    if rights & chess.BB_A8:
+        key ^= ZOBRIST[771]
+    if board.ep_square is not None:
+        # Only counts if a pawn of the side to move could capture there
+        if board.turn == chess.WHITE:
+            ep_mask = chess.shift_down(chess.BB_SQUARES[board.ep_square])
+        else:
+            ep_mask = chess.shift_up(chess.BB_SQUARES[board.ep_square])
+        ep_mask = chess.shift_left(ep_mask) | chess.shift_right(ep_mask)
+        if ep_mask & board.pawns & board.occupied_co[board.turn]:
+            key ^= ZOBRIST[772 + chess.square_file(board.ep_square)]
+    if board.turn == chess.WHITE:
+        key ^= ZOBRIST[780]
+    return key
+
+
+class SearchBoard(chess.Board):
+    """
+    A chess.Board that keeps running totals the search needs on every node.
+
+    For each position along the move stack it keeps the 64-bit Zobrist key
+    and the material + piece-square score (centipawns, White positive).
+    Both are updated in push() from the few squares a move touches and
+    restored in pop(), so hashing or scoring a position never rescans the
+    board or builds a FEN string. A count of how often each key occurs on
+    the stack makes the repetition check in is_rule_draw() a dictionary
+    lookup instead of a replay of the game. Do not assign to board.turn,
+    ep_square etc. directly; use push()/pop() or set_fen(), which resets
+    the totals.
+    """
+
+    def clear_stack(self):
+        super().clear_stack()
+        # Totals of the positions along the move stack, newest last. They may
+        # cover fewer positions than the move stack (or none) and are refilled
+        # lazily from the current position.
+        self._keys = []
+        self._scores = []
+        self._counts = {}  # Zobrist key -> occurrences in self._keys
+
+    @classmethod
+    def from_board(cls, board):
+        search_board = cls(board.root().fen(), chess960=board.chess960)
+        for move in board.move_stack:
+            search_board.push(move)
+        return search_board
+
+    def copy(self, *, stack=True):
+        board = super().copy(stack=stack)
+        if self._keys:
+            kept = len(board.move_stack) + 1
+            board._keys = self._keys[-kept:]
+            board._scores = self._scores[-kept:]
+            if kept >= len(self._keys):
+                board._counts = dict(self._counts)
+            else:
+                for key in board._keys:
+                    board._counts[key] = board._counts.get(key, 0) + 1
+        return board
+
+    def _start_totals(self):
+        if self.move_stack:
+            # Replay the game so that earlier positions count as repetitions
+            replay = self.root()
+            replay._start_totals()
+            for move in self.move_stack:
+                replay.push(move)
+            self._keys, self._scores, self._counts = replay._keys, replay._scores, replay._counts
+            return
+        key = chess.polyglot.zobrist_hash(self)
+        self._keys.append(key)
+        self._counts[key] = 1
+        score = 0
+        for square, piece in self.piece_map().items():
+            score += PIECE_SQUARE[piece.color][piece.piece_type][square]
+        self._scores.append(score)
+
+    def zobrist_key(self):
+        if not self._keys:
+            self._start_totals()
+        return self._keys[-1]
+
+    def material_score(self):
+        # Material plus piece-square bonuses in centipawns, White positive
+        if not self._scores:
+            self._start_totals()
+        return self._scores[-1]
+
+    def repetitions(self):
+        # How often the current position has occurred in the game so far.
+        # Positions before a capture, pawn move or change of castling rights
+        # can never come back, so the whole stack can be counted.
+        key = self.zobrist_key()  # Fills the totals first if needed
+        return self._counts[key]
+
+    def is_rule_draw(self):
+        """
+        True if the game is drawn by threefold repetition, the fifty-move
+        rule or insufficient material. Unlike can_claim_draw() this does not
+        replay the move stack or try the legal moves, it is a counter lookup.
+        """
+        if self.halfmove_clock >= 100:
+            # A checkmate delivered on the hundredth half-move still counts
+            if not self.is_check() or any(self.generate_legal_moves()):
+                return True
+        return self.repetitions() >= 3 or self.is_insufficient_material()
+
+    def _touched_squares(self, move):
+        if not move:
+            return ()
+        if self.is_castling(move):
+            return chess.SquareSet(chess.BB_RANK_1 if self.turn == chess.WHITE else chess.BB_RANK_8)
+        if self.is_en_passant(move):
+            return move.from_square, move.to_square, move.to_square + (-8 if self.turn == chess.WHITE else 8)
+        return move.from_square, move.to_square
+
+    def push(self, move):
+        if not self._keys:
+            super().push(move)
+            return
+        key = self._keys[-1] ^ _state_key(self)
+        score = self._scores[-1]
+        squares = self._touched_squares(move)
+        for square in squares:
+            square_key, square_score = _square_terms(self, square)
+            key ^= square_key
+            score -= square_score
+        super().push(move)
+        for square in squares:
+            square_key, square_score = _square_terms(self, square)
+            key ^= square_key
+            score += square_score
+        key ^= _state_key(self)
+        self._keys.append(key)
+        self._scores.append(score)
+        self._counts[key] = self._counts.get(key, 0) + 1
+
+    def pop(self):
+        move = super().pop()
+        if self._keys:
+            key = self._keys.pop()
+            self._scores.pop()
+            if self._counts[key] == 1:
+                del self._counts[key]
+            else:
+                self._counts[key] -= 1
+        return move
+
+
+# Bitboard attack masks. Shifting a whole bitboard attacks from every piece on
+# it at once; sliding pieces are filled along each direction through empty
+# squares (Kogge-Stone fill), so no move lists are needed. The helpers never
+# update their arguments in place, so batch_eval.py can run them on NumPy
+# arrays of bitboards as well as on ints.
+BB_ALL = chess.BB_ALL
+NOT_FILE_A = BB_ALL & ~chess.BB_FILE_A
+NOT_FILE_H = BB_ALL & ~chess.BB_FILE_H
+NOT_FILE_AB = NOT_FILE_A & ~chess.BB_FILE_B
+NOT_FILE_GH = NOT_FILE_H & ~chess.BB_FILE_G
+
+# (shift, mask) per direction: a positive shift moves up the board (towards
+# h8), a negative one down; the mask drops squares that wrapped around a file
+ORTHOGONAL_STEPS = ((8, BB_ALL), (-8, BB_ALL), (1, NOT_FILE_A), (-1, NOT_FILE_H))
+DIAGONAL_STEPS = ((9, NOT_FILE_A), (7, NOT_FILE_H), (-7, NOT_FILE_A), (-9, NOT_FILE_H))
+KNIGHT_STEPS = ((17, NOT_FILE_A), (15, NOT_FILE_H), (10, NOT_FILE_AB), (6, NOT_FILE_GH),
+                (-6, NOT_FILE_AB), (-10, NOT_FILE_GH), (-15, NOT_FILE_A), (-17, NOT_FILE_H))
+
+MOBILITY_WEIGHT = 5  # Centipawns per square attacked by a knight, bishop, rook or queen
+KING_ZONE_WEIGHT = 10  # Centipawns lost per square next to the king the enemy attacks
+
+
+def _shift(bb, shift, mask):
+    return ((bb << shift) if shift > 0 else (bb >> -shift)) & mask
+
+
+def _slide(gen, empty, steps):
+    # Union of the squares sliders on gen attack along the given directions
+    attacks = 0
+    for shift, mask in steps:
+        flood, open_squares = gen, empty & mask
+        if shift > 0:
+            flood = flood | open_squares & (flood << shift)
+            open_squares = open_squares & (open_squares << shift)
+            flood = flood | open_squares & (flood << 2 * shift)
+            open_squares = open_squares & (open_squares << 2 * shift)
+            flood = flood | open_squares & (flood << 4 * shift)
+            attacks = attacks | (flood << shift) & mask
+        else:
+            flood = flood | open_squares & (flood >> -shift)
+            open_squares = open_squares & (open_squares >> -shift)
+            flood = flood | open_squares & (flood >> -2 * shift)
+            open_squares = open_squares & (open_squares >> -2 * shift)
+            flood = flood | open_squares & (flood >> -4 * shift)
+            attacks = attacks | (flood >> -shift) & mask
+    return attacks
+
+
+def attack_masks(board, color):
+    """
+    Squares attacked by color's knights, bishops, rooks and queens, and
+    squares attacked by all of color's pieces, as two bitboards.
+    """
+    ours = board.occupied_co[color]
+    empty = BB_ALL & ~board.occupied
+    queens = board.queens & ours
+    knights = board.knights & ours
+    pieces = _slide((board.rooks & ours) | queens, empty, ORTHOGONAL_STEPS)
+    pieces |= _slide((board.bishops & ours) | queens, empty, DIAGONAL_STEPS)
+    for shift, mask in KNIGHT_STEPS:
+        pieces |= _shift(knights, shift, mask)
+    pawns = board.pawns & ours
+    forward = 8 if color == chess.WHITE else -8
+    everything = pieces | _shift(pawns, forward + 1, NOT_FILE_A) | _shift(pawns, forward - 1, NOT_FILE_H)
+    kings = board.kings & ours
+    for shift, mask in ORTHOGONAL_STEPS + DIAGONAL_STEPS:
+        everything |= _shift(kings, shift, mask)
+    return pieces, everything
+
+
+def _king_zone(kings):
+    zone = kings
+    for shift, mask in ORTHOGONAL_STEPS + DIAGONAL_STEPS:
+        zone = zone | _shift(kings, shift, mask)
+    return zone
+
+
+# Bound types stored in the transposition table
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class TranspositionTable:
+    """
+    Fixed-size table of search results keyed by Zobrist key.
+
+    Each slot holds (key, depth, score, bound, best_move, generation), where
+    depth is the remaining search depth and bound says whether score is
+    EXACT, a LOWER bound (fail high) or an UPPER bound (fail low). A slot is
+    replaced when it is empty, holds the same position, was written by an
+    earlier search (aging), or the new result is at least as deep.
+    """
+
+    # Rough CPython size of one stored slot (tuple, key int and list pointer)
+    ENTRY_BYTES = 192
+
+    def __init__(self, size_mb=64):
+        slots = max(1, int(size_mb * 1024 * 1024) // self.ENTRY_BYTES)
+        self.size = 1 << (slots.bit_length() - 1)  # Power of two, index with a mask
+        self.mask = self.size - 1
+        self.slots = [None] * self.size
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+
+    def new_search(self):
+        # Entries from older searches become the first to be replaced
+        self.generation += 1
+
+    def clear(self):
+        self.slots = [None] * self.size
+
+    def probe(self, key):
+        self.probes += 1
+        entry = self.slots[key & self.mask]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        index = key & self.mask
+        entry = self.slots[index]
+        if entry is None or entry[0] == key or entry[5] != self.generation or depth >= entry[1]:
+            self.slots[index] = (key, depth, score, bound, move, self.generation)
+
+
 class State:
     def __init__(self, board=None, player=True):
         if board is None:
-            self.board = chess.Board()
-        else:
+            self.board = SearchBoard()
+        elif isinstance(board, SearchBoard):
             self.board = board
+        else:
+            self.board = SearchBoard.from_board(board)
         self.player = player  # True = White's turn, False = Black's turn
 
     def goalTest(self):
@@ -97,7 +480,13 @@ class State:
         return None
 
     def isTerminal(self):
-        return self.board.is_game_over()
+        # The same positions as board.is_game_over(): no legal move
+        # (checkmate or stalemate), insufficient material, the 75-move rule
+        # or fivefold repetition. Claimable draws (threefold, fifty moves)
+        # do not end the game, but the searches score them as draws.
+        board = self.board
+        return (not any(board.generate_legal_moves()) or board.is_insufficient_material()
+                or board.halfmove_clock >= 150 or board.repetitions() >= 5)
 
     def moveGen(self):
         # Generate next states
@@ -108,16 +497,28 @@ class State:
             children.append(State(new_board, not self.player))
         return children
 
+    def makeMove(self, move):
+        # Play a move on this state's own board instead of a copy.
+        # Undo it with unmakeMove() before looking at a sibling move.
+        self.board.push(move)
+        self.player = not self.player
+
+    def unmakeMove(self):
+        self.player = not self.player
+        return self.board.pop()
+
     def __str__(self):
         return str(self.board)
 
     def __eq__(self, other):
-        return self.board.fen() == other.board.fen() and self.player == other.player
+        # Same position (pieces, side to move, castling, en passant); the move
+        # clocks are ignored, as in a transposition table
+        return self.board.zobrist_key() == other.board.zobrist_key() and self.player == other.player
 
     def __hash__(self):
-        return hash((self.board.fen(), self.player))
+        return hash((self.board.zobrist_key(), self.player))
 
-    def evaluate(self):
+    def evaluate(self, has_moves=None):
         """
         Evaluation function for chess positions.
 
@@ -191,35 +592,89 @@ class State:
                       score -= 0.5 * len(attackers)  # White king under attack
             - Do the same for Black king (attackers from White).
 
-        For now, the function just returns 0.
-        Replace with your material calculation and add improvements.
+        How it is done here:
+          (a) and (b) come from SearchBoard.material_score(), a running
+          total of piece values plus piece-square tables that push() and
+          pop() update, so no piece_map() scan happens at the leaves.
+          (c) and (d) use bitboard attack masks (attack_masks()) instead
+          of move lists: mobility counts the squares each side's knights,
+          bishops, rooks and queens attack, king safety counts the squares
+          around each king the enemy attacks. That is a handful of shifts
+          and popcounts per call.
+          Step 1 looks for a single legal move instead of generating them
+          all twice for is_checkmate() and is_stalemate(); a search that
+          already has the move list passes has_moves (True/False) to skip
+          even that. Draws come from SearchBoard.is_rule_draw().
         """
 
         # Step 1: Handle finished games
-        if self.board.is_checkmate():
-            return -1000 if self.player else 1000  # Current player is mated
-        if self.board.is_stalemate() or self.board.is_insufficient_material() or self.board.can_claim_draw():
+        board = self.board
+        if has_moves is None:
+            has_moves = any(board.generate_legal_moves())
+        if not has_moves:
+            if board.is_check():
+                return -1000 if self.player else 1000  # Current player is mated
+            return 0  # Stalemate
+        if board.is_rule_draw():
             return 0
 
-        # Step 2: YOUR WORK STARTS HERE
-        # ------------------------------------
-        # Right now we return 0 for all positions.
-        # This means the AI plays randomly.
-        # Replace this with your own scoring rules!
-        return 0
-        # ------------------------------------
+        # Step 2: Score the position in centipawns, then convert to pawns
+        # (a) + (b) Material and piece-square bonuses (center control
+        # included), kept up to date by SearchBoard on every push/pop
+        score = board.material_score()
+
+        # (c) + (d) Mobility and king safety from bitboard attack masks
+        white_pieces, white_all = attack_masks(board, chess.WHITE)
+        black_pieces, black_all = attack_masks(board, chess.BLACK)
+        white_mobility = (white_pieces & ~board.occupied_co[chess.WHITE]).bit_count()
+        black_mobility = (black_pieces & ~board.occupied_co[chess.BLACK]).bit_count()
+        score += MOBILITY_WEIGHT * (white_mobility - black_mobility)
+        score -= KING_ZONE_WEIGHT * (_king_zone(board.kings & board.occupied_co[chess.WHITE]) & black_all).bit_count()
+        score += KING_ZONE_WEIGHT * (_king_zone(board.kings & board.occupied_co[chess.BLACK]) & white_all).bit_count()
+
+        return score / 100
 
+    def centipawns(self, has_moves=None):
+        # evaluate() as an int in centipawns for the side to move (negamax view)
+        score = round(self.evaluate(has_moves) * 100)
+        return score if self.player else -score
 
-def minimax(state, depth, alpha, beta, maximizingPlayer, maxDepth):
-    if state.isTerminal() or depth == maxDepth:
+
+def minimax(state, depth, alpha, beta, maximizingPlayer, maxDepth, tt=None):
+    if depth == maxDepth or state.isTerminal():
         return state.evaluate(), None
 
+    # Transposition table: reuse results for positions reached by another
+    # move order. The root always searches so that it can return a move.
+    tt_move = None
+    if tt is not None:
+        key = state.board.zobrist_key()
+        remaining = maxDepth - depth
+        entry = tt.probe(key)
+        if entry is not None:
+            _, entry_depth, entry_score, entry_bound, tt_move, _ = entry
+            if depth > 0 and entry_depth >= remaining:
+                if entry_bound == EXACT:
+                    return entry_score, tt_move
+                if entry_bound == LOWER:
+                    alpha = max(alpha, entry_score)
+                else:
+                    beta = min(beta, entry_score)
+                if alpha >= beta:
+                    return entry_score, tt_move
+        alpha_start, beta_start = alpha, beta
+
+    children = state.moveGen()
+    if tt_move is not None:
+        # Search the stored best move first
+        children.sort(key=lambda child: child.board.peek() != tt_move)
+
     best_move = None
 
     if maximizingPlayer:  # MAX node (White)
         maxEval = float('-inf')
-        for child in state.moveGen():
-            eval_score, _ = minimax(child, depth + 1, alpha, beta, False, maxDepth)
+        for child in children:
+            eval_score, _ = minimax(child, depth + 1, alpha, beta, False, maxDepth, tt)
 
             if eval_score > maxEval:
                 maxEval = eval_score
@@ -229,12 +684,12 @@ def minimax(state, depth, alpha, beta, maximizingPlayer, maxDepth):
             if alpha >= beta:
                 break  # Alpha-beta pruning
 
-        return maxEval, best_move
+        best_score = maxEval
 
     else:  # MIN node (Black)
         minEval = float('inf')
-        for child in state.moveGen():
-            eval_score, _ = minimax(child, depth + 1, alpha, beta, True, maxDepth)
+        for child in children:
+            eval_score, _ = minimax(child, depth + 1, alpha, beta, True, maxDepth, tt)
 
             if eval_score < minEval:
                 minEval = eval_score
@@ -244,12 +699,792 @@ def minimax(state, depth, alpha, beta, maximizingPlayer, maxDepth):
             if alpha >= beta:
                 break
 
-        return minEval, best_move
+        best_score = minEval
+
+    if tt is not None:
+        if best_score <= alpha_start:
+            bound = UPPER
+        elif best_score >= beta_start:
+            bound = LOWER
+        else:
+            bound = EXACT
+        tt.store(key, remaining, best_score, bound, best_move)
+
+    return best_score, best_move
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget for a move has run out."""
+
+
+class SearchStats:
+    """
+    Counters describing one search, filled in as minimax_inplace and
+    iterative_deepening run.
+
+    nodes counts every position visited, interior_nodes those whose moves
+    were searched. cutoffs counts beta cutoffs, first_move_cutoffs those
+    caused by the first move tried (a measure of move ordering). tt_probes
+    and tt_hits come from the transposition table. iterations has one dict
+    per finished iteration with depth, nodes, seconds, score, move and pv.
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.interior_nodes = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.seconds = 0.0
+        self.iterations = []
+
+    @property
+    def nps(self):
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def cutoff_rate(self):
+        return self.cutoffs / self.interior_nodes if self.interior_nodes else 0.0
+
+    @property
+    def first_move_cutoff_rate(self):
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    @property
+    def tt_hit_rate(self):
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    @property
+    def branching_factor(self):
+        # Effective branching factor: growth in nodes from one iteration to the next
+        if len(self.iterations) < 2 or not self.iterations[-2]["nodes"]:
+            return 0.0
+        return self.iterations[-1]["nodes"] / self.iterations[-2]["nodes"]
+
+    def as_dict(self):
+        return {
+            "nodes": self.nodes,
+            "seconds": self.seconds,
+            "nps": self.nps,
+            "branching_factor": self.branching_factor,
+            "cutoff_rate": self.cutoff_rate,
+            "first_move_cutoff_rate": self.first_move_cutoff_rate,
+            "tt_hit_rate": self.tt_hit_rate,
+            "iterations": [
+                dict(iteration, move=iteration["move"].uci() if iteration["move"] else None,
+                     pv=[move.uci() for move in iteration["pv"]])
+                for iteration in self.iterations
+            ],
+        }
+
+    def __str__(self):
+        lines = [f"nodes {self.nodes}  time {self.seconds:.3f}s  nps {self.nps:.0f}  "
+                 f"ebf {self.branching_factor:.2f}  cutoffs {self.cutoff_rate:.1%}  "
+                 f"first-move cutoffs {self.first_move_cutoff_rate:.1%}  tt hits {self.tt_hit_rate:.1%}"]
+        for iteration in self.iterations:
+            lines.append(f"  depth {iteration['depth']:>2}  nodes {iteration['nodes']:>9}  "
+                         f"time {iteration['seconds']:.3f}s  score {iteration['score']}  "
+                         f"pv {' '.join(move.uci() for move in iteration['pv'])}")
+        return "\n".join(lines)
+
+
+class SearchContext:
+    """
+    State shared by every node of one iterative-deepening search.
+
+    Besides the time limit and node counter it holds the move-ordering
+    heuristics: the principal variation (PV) of the last finished iteration,
+    two killer moves per ply (quiet moves that caused a cutoff there) and a
+    history table of how often a quiet move caused a cutoff anywhere.
+
+    With batch_leaves=True, the searches score all children of a node in
+    one batch_eval.evaluate_children() call (needs NumPy) instead of one
+    evaluate() per child: minimax_inplace() and pvs() at nodes just above
+    the leaves, and quiescence() for the stand-pat scores of its captures.
+    The results and node counts are the same; it pays off where few of
+    those children are cut off by alpha-beta.
+    """
+
+    def __init__(self, tt=None, deadline=None, stop=None, batch_leaves=False):
+        self.tt = tt
+        self.deadline = deadline  # time.perf_counter() value, or None for no limit
+        self.stop = stop  # threading.Event that ends the search when set
+        self.nodes = 0
+        self.pv = []  # PV of the last completed iteration, one move per ply
+        self.pv_table = {}  # ply -> best line found below that ply in this iteration
+        self.follow_pv = False  # True while the current path is still the PV
+        self.killers = {}  # ply -> up to two quiet moves
+        self.history = {}  # (color, from_square, to_square) -> score
+        self.batch_leaves = batch_leaves
+        self.stats = SearchStats()
+
+    def count_node(self):
+        self.nodes += 1
+        if self.nodes & 255 == 0:
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                raise SearchTimeout()
+            if self.stop is not None and self.stop.is_set():
+                raise SearchTimeout()
+
+    def order_moves(self, board, ply, tt_move=None, moves=None):
+        pv_move = self.pv[ply] if self.follow_pv and ply < len(self.pv) else None
+        killers = self.killers.get(ply, ())
+        turn = board.turn
+
+        def priority(move):
+            if move == pv_move:
+                return 5, 0
+            if move == tt_move:
+                return 4, 0
+            victim = board.piece_type_at(move.to_square)
+            if victim is None and board.is_en_passant(move):
+                victim = chess.PAWN
+            if victim is not None:
+                # MVV-LVA: most valuable victim first, cheapest attacker first
+                return 3, 8 * victim - board.piece_type_at(move.from_square)
+            if move.promotion:
+                return 3, 8 * move.promotion
+            if move in killers:
+                return 2, -killers.index(move)
+            return 1, self.history.get((turn, move.from_square, move.to_square), 0)
+
+        if moves is None:
+            moves = board.generate_legal_moves()
+        return sorted(moves, key=priority, reverse=True)
+
+    def record_cutoff(self, board, move, ply, remaining, first):
+        self.stats.cutoffs += 1
+        if first:
+            self.stats.first_move_cutoffs += 1
+        if board.is_capture(move) or move.promotion:
+            return
+        killers = self.killers.setdefault(ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        key = (board.turn, move.from_square, move.to_square)
+        self.history[key] = self.history.get(key, 0) + remaining * remaining
+
+
+def minimax_inplace(state, depth, alpha, beta, maximizingPlayer, maxDepth, tt=None, ctx=None):
+    """
+    Same search as minimax(), but it plays and takes back moves on state's
+    one board (makeMove/unmakeMove) instead of building a copied State for
+    every child. Moves are generated lazily, so after an alpha-beta cutoff
+    the remaining siblings are never even created.
+
+    With a SearchContext, moves are ordered (PV, transposition table move,
+    MVV-LVA captures, killers, history) and the time limit is enforced.
+
+    The board is back in its original position when this returns normally.
+    After a SearchTimeout the caller has to restore it.
+    """
+    if ctx is not None:
+        ctx.count_node()
+        ctx.pv_table[depth] = []
+
+    if depth == maxDepth:
+        return state.evaluate(), None
+    if depth > 0 and state.board.is_rule_draw():
+        return 0, None  # The root still searches, so that it returns a move
+
+    tt_move = None
+    if tt is not None:
+        key = state.board.zobrist_key()
+        remaining = maxDepth - depth
+        entry = tt.probe(key)
+        if entry is not None:
+            _, entry_depth, entry_score, entry_bound, tt_move, _ = entry
+            if depth > 0 and entry_depth >= remaining:
+                if entry_bound == EXACT:
+                    return entry_score, tt_move
+                if entry_bound == LOWER:
+                    alpha = max(alpha, entry_score)
+                else:
+                    beta = min(beta, entry_score)
+                if alpha >= beta:
+                    return entry_score, tt_move
+        alpha_start, beta_start = alpha, beta
+
+    leaf_scores = None
+    if ctx is not None:
+        on_pv = ctx.follow_pv
+        moves = ctx.order_moves(state.board, depth, tt_move)
+        ctx.stats.interior_nodes += 1
+        if ctx.batch_leaves and depth + 1 == maxDepth and moves:
+            # Imported here: NumPy is only needed when batching is switched on
+            from batch_eval import evaluate_children
+
+            leaf_scores = evaluate_children(state, moves).tolist()
+    else:
+        # Safe to iterate while searching: every child is unmade before the
+        # generator resumes, so it always sees the same position
+        moves = state.board.generate_legal_moves()
+        if tt_move is not None and state.board.is_legal(tt_move):
+            # Search the stored best move first
+            moves = itertools.chain((tt_move,), (move for move in moves if move != tt_move))
+
+    best_move = None
+
+    if maximizingPlayer:  # MAX node (White)
+        best_score = float('-inf')
+        for index, move in enumerate(moves):
+            if ctx is not None:
+                ctx.follow_pv = on_pv and best_move is None
+            if leaf_scores is not None:
+                ctx.count_node()
+                ctx.pv_table[depth + 1] = []
+                eval_score = leaf_scores[index]
+            else:
+                state.makeMove(move)
+                eval_score, _ = minimax_inplace(state, depth + 1, alpha, beta, False, maxDepth, tt, ctx)
+                state.unmakeMove()
+
+            if eval_score > best_score:
+                best_score = eval_score
+                best_move = move
+                if ctx is not None:
+                    ctx.pv_table[depth] = [move] + ctx.pv_table[depth + 1]
+
+            alpha = max(alpha, eval_score)
+            if alpha >= beta:
+                if ctx is not None:
+                    ctx.record_cutoff(state.board, move, depth, maxDepth - depth, index == 0)
+                break  # Alpha-beta pruning
+
+    else:  # MIN node (Black)
+        best_score = float('inf')
+        for index, move in enumerate(moves):
+            if ctx is not None:
+                ctx.follow_pv = on_pv and best_move is None
+            if leaf_scores is not None:
+                ctx.count_node()
+                ctx.pv_table[depth + 1] = []
+                eval_score = leaf_scores[index]
+            else:
+                state.makeMove(move)
+                eval_score, _ = minimax_inplace(state, depth + 1, alpha, beta, True, maxDepth, tt, ctx)
+                state.unmakeMove()
+
+            if eval_score < best_score:
+                best_score = eval_score
+                best_move = move
+                if ctx is not None:
+                    ctx.pv_table[depth] = [move] + ctx.pv_table[depth + 1]
+
+            beta = min(beta, eval_score)
+            if alpha >= beta:
+                if ctx is not None:
+                    ctx.record_cutoff(state.board, move, depth, maxDepth - depth, index == 0)
+                break
+
+    if best_move is None:
+        # No legal moves: checkmate or stalemate, found by the move loop
+        return state.evaluate(has_moves=False), None
+
+    if tt is not None:
+        if best_score <= alpha_start:
+            bound = UPPER
+        elif best_score >= beta_start:
+            bound = LOWER
+        else:
+            bound = EXACT
+        tt.store(key, remaining, best_score, bound, best_move)
+
+    return best_score, best_move
+
+
+ASPIRATION_WINDOW = 50  # Centipawns either side of the previous iteration's score
+MATE_SCORE = 100000  # centipawns() of a side that is checkmated, negated
+
+
+def _child_stand_pats(state, moves):
+    # centipawns() of the position after each move, for the side to move
+    # there, from one batch_eval.evaluate_children() call. Imported here:
+    # NumPy is only needed when batching is switched on
+    from batch_eval import evaluate_children
+
+    sign = -1 if state.player else 1
+    return [round(score * 100) * sign for score in evaluate_children(state, moves).tolist()]
+
+
+def quiescence(state, alpha, beta, ply, ctx, stand_pat=None):
+    """
+    Search captures and promotions only until the position is quiet, so a
+    leaf is never scored in the middle of an exchange. In check, every
+    evasion is searched instead. Negamax scores in centipawns for the side
+    to move. stand_pat is this position's centipawns() if the caller
+    already has it.
+    """
+    ctx.count_node()
+    board = state.board
+    if board.is_check():
+        moves = ctx.order_moves(board, ply)
+        if not moves:
+            return state.centipawns(has_moves=False)  # Checkmate
+        best_score = float('-inf')
+    else:
+        moves = list(board.generate_legal_moves())
+        if stand_pat is None:
+            stand_pat = state.centipawns(has_moves=bool(moves))
+        best_score = stand_pat  # "Stand pat": the side to move may decline to capture
+        if best_score >= beta or not moves:
+            return best_score
+        alpha = max(alpha, best_score)
+        moves = ctx.order_moves(board, ply, moves=[move for move in moves if move.promotion or board.is_capture(move)])
+
+    stand_pats = _child_stand_pats(state, moves) if ctx.batch_leaves and moves else None
+    for index, move in enumerate(moves):
+        state.makeMove(move)
+        score = -quiescence(state, -beta, -alpha, ply + 1, ctx, stand_pats[index] if stand_pats else None)
+        state.unmakeMove()
+        if score > best_score:
+            best_score = score
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+    return best_score
+
+
+def pvs(state, depth, alpha, beta, ply, ctx, stand_pat=None):
+    """
+    Principal variation search: negamax alpha-beta in centipawns for the
+    side to move, used by iterative_deepening().
+
+    The first move at each node is searched with the full (alpha, beta)
+    window; later moves get a null window (alpha, alpha + 1) that only
+    proves they are no better, and are searched again with the full window
+    when that proof fails. Late quiet moves at nodes with depth >= 3 are
+    searched at reduced depth first (late-move reductions) and re-searched
+    at full depth if they beat alpha. At depth 0 quiescence() takes over,
+    with stand_pat passed on to it. With ctx.batch_leaves, a node at depth
+    1 scores all its children for quiescence() in one batch.
+
+    Returns (score, best_move). Scores in the transposition table are in
+    this negamax form, so don't share a table with minimax()/minimax_inplace().
+    """
+    ctx.count_node()
+    ctx.pv_table[ply] = []
+    board = state.board
+
+    if ply > 0 and board.is_rule_draw():
+        return 0, None
+    if depth <= 0:
+        return quiescence(state, alpha, beta, ply, ctx, stand_pat), None
+
+    tt = ctx.tt
+    tt_move = None
+    if tt is not None:
+        key = board.zobrist_key()
+        entry = tt.probe(key)
+        if entry is not None:
+            _, entry_depth, entry_score, entry_bound, tt_move, _ = entry
+            if ply > 0 and entry_depth >= depth:
+                if entry_bound == EXACT:
+                    return entry_score, tt_move
+                if entry_bound == LOWER:
+                    alpha = max(alpha, entry_score)
+                else:
+                    beta = min(beta, entry_score)
+                if alpha >= beta:
+                    return entry_score, tt_move
+    alpha_start = alpha
+
+    on_pv = ctx.follow_pv
+    moves = ctx.order_moves(board, ply, tt_move)
+    if not moves:
+        return state.centipawns(has_moves=False), None  # Checkmate or stalemate
+    ctx.stats.interior_nodes += 1
+    in_check = board.is_check()
+    killers = ctx.killers.get(ply, ())
+    stand_pats = _child_stand_pats(state, moves) if ctx.batch_leaves and depth == 1 else None
+
+    best_score, best_move = float('-inf'), None
+    for index, move in enumerate(moves):
+        ctx.follow_pv = on_pv and index == 0
+        quiet = not move.promotion and not board.is_capture(move)
+        child_stand_pat = stand_pats[index] if stand_pats else None
+        state.makeMove(move)
+        if index == 0:
+            score = -pvs(state, depth - 1, -beta, -alpha, ply + 1, ctx, child_stand_pat)[0]
+        else:
+            reduction = 0
+            if depth >= 3 and index >= 3 and quiet and not in_check and move not in killers and not board.is_check():
+                reduction = 2 if index >= 8 and depth >= 5 else 1
+            score = -pvs(state, depth - 1 - reduction, -alpha - 1, -alpha, ply + 1, ctx, child_stand_pat)[0]
+            if reduction and score > alpha:
+                score = -pvs(state, depth - 1, -alpha - 1, -alpha, ply + 1, ctx)[0]
+            if alpha < score < beta:
+                score = -pvs(state, depth - 1, -beta, -alpha, ply + 1, ctx, child_stand_pat)[0]
+        state.unmakeMove()
+
+        if score > best_score:
+            best_score, best_move = score, move
+            ctx.pv_table[ply] = [move] + ctx.pv_table.get(ply + 1, [])
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    ctx.record_cutoff(board, move, ply, depth, index == 0)
+                    break
+
+    if tt is not None:
+        if best_score <= alpha_start:
+            bound = UPPER
+        elif best_score >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        tt.store(key, depth, best_score, bound, best_move)
+
+    return best_score, best_move
+
+
+def aspiration_search(state, depth, ctx, guess=None):
+    """
+    Run pvs() at the root in a narrow window around guess (the previous
+    iteration's score), widening it whenever the score falls outside.
+    Returns (score, best_move) as pvs() does.
+    """
+    if guess is None or abs(guess) >= MATE_SCORE:
+        return pvs(state, depth, float('-inf'), float('inf'), 0, ctx)
+    delta = ASPIRATION_WINDOW
+    alpha, beta = guess - delta, guess + delta
+    while True:
+        score, move = pvs(state, depth, alpha, beta, 0, ctx)
+        if alpha < score < beta:
+            return score, move
+        delta *= 4  # Widen first, so the re-search never repeats the failed window
+        if score <= alpha:
+            alpha = guess - delta if delta < MATE_SCORE else float('-inf')
+        else:
+            beta = guess + delta if delta < MATE_SCORE else float('inf')
+        ctx.follow_pv = True
+
+
+def _search_root_move(task):
+    # Runs in a worker process: search one root move with pvs() in the given
+    # window, both in centipawns for the side to move at the root
+    root_fen, history, move, maxDepth, alpha, beta, deadline, tt_mb, batch_leaves = task
+    board = SearchBoard(root_fen)
+    for uci in history:
+        board.push(chess.Move.from_uci(uci))
+    state = State(board, board.turn)
+    state.makeMove(chess.Move.from_uci(move))
+    ctx = SearchContext(TranspositionTable(tt_mb), batch_leaves=batch_leaves)
+    if deadline is not None:
+        ctx.deadline = time.perf_counter() + (deadline - time.time())
+    try:
+        score, _ = pvs(state, maxDepth - 1, -beta, -alpha, 1, ctx)
+    except SearchTimeout:
+        return None, ctx.nodes
+    return -score, ctx.nodes
+
+
+def parallel_search(state, maxDepth, workers=1, executor=None, deadline=None, first_move=None, tt_mb=16,
+                    batch_leaves=False):
+    """
+    Fixed-depth search that splits the root moves over worker processes.
+    Below the root each move is searched with pvs() and quiescence(), as
+    in the sequential search, so the thread count does not change the
+    kind of search; only root-level reductions and the aspiration window
+    are left out.
+
+    The first root move is searched on its own with a full window. Its score
+    then bounds the search of every other root move, and those run in
+    parallel ("young brothers wait"). Each task gets the same window and
+    fresh tables, so the move, score and node count do not depend on the
+    number of workers or on the order in which tasks finish. workers=1 runs
+    the same tasks one after another in this process and is the sequential
+    reference.
+
+    Pass an existing concurrent.futures executor to avoid starting a new
+    process pool per call. deadline is a time.time() value; SearchTimeout
+    is raised if it passes before every root move is done. first_move is
+    searched first (e.g. the best move of a shallower search). batch_leaves
+    is passed on to each task's SearchContext.
+
+    Returns (score, best_move, nodes), with the score in pawns from White's
+    side like iterative_deepening()'s.
+
+    The speedup is bounded by the first root move, which runs alone, and by
+    the largest remaining subtree; speedup_curve() measures it.
+    """
+    board = state.board
+    sign = 1 if state.player else -1  # pvs() scores are for the side to move
+    moves = SearchContext().order_moves(board, 0, first_move)
+    if not moves:
+        return state.centipawns(has_moves=False) * sign / 100, None, 1  # Checkmate or stalemate
+
+    root_fen = board.root().fen()
+    history = [move.uci() for move in board.move_stack]
+
+    def task(move, alpha, beta):
+        return root_fen, history, move.uci(), maxDepth, alpha, beta, deadline, tt_mb, batch_leaves
+
+    own_pool = None
+    if executor is None and workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        executor = own_pool = ProcessPoolExecutor(max_workers=workers)
+    run = executor.map if executor is not None else map
+    try:
+        first_score, nodes = next(iter(run(_search_root_move, [task(moves[0], float('-inf'), float('inf'))])))
+        if first_score is None:
+            raise SearchTimeout()
+        best_score, best_move = first_score, moves[0]
+
+        # The rest only have to beat first_score
+        results = run(_search_root_move, [task(move, first_score, float('inf')) for move in moves[1:]])
+        for move, (score, move_nodes) in zip(moves[1:], results):
+            if score is None:
+                raise SearchTimeout()
+            nodes += move_nodes
+            if score > best_score:
+                best_score, best_move = score, move
+    finally:
+        if own_pool is not None:
+            own_pool.shutdown(cancel_futures=True)
+
+    return best_score * sign / 100, best_move, nodes + 1
+
+
+def speedup_curve(state, maxDepth, max_workers=None):
+    """
+    Time parallel_search on state with 1, 2, 4, ... max_workers processes,
+    print a table of seconds and speedup over one worker, and return it as
+    a list of (workers, seconds, speedup). Every run must give the same
+    move, score and node count as parallel_search with one worker; that is
+    not the sequential iterative_deepening() search, whose root uses
+    reductions and an aspiration window and so visits other nodes.
+
+    Measured at depth 4 after 1. e4 e5 2. Nf3 Nc6, on a machine with a
+    single core, so the processes only take turns:
+
+        workers   seconds  speedup  move   score  nodes
+              1      9.15     1.00  b1c3     0.3  48437
+              2      8.85     1.03  b1c3     0.3  48437
+              4      7.91     1.16  b1c3     0.3  48437
+
+    The curve on more cores is still to be measured.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    max_workers = max_workers or os.cpu_count()
+    counts = sorted({1, max_workers} | {1 << i for i in range(max_workers.bit_length()) if 1 << i < max_workers})
+    curve = []
+    reference = None
+    print(f"{'workers':>7} {'seconds':>9} {'speedup':>8}  move   score  nodes")
+    for workers in counts:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pool.submit(int).result()  # Start the workers before timing
+            start = time.perf_counter()
+            score, move, nodes = parallel_search(state, maxDepth, executor=pool)
+            seconds = time.perf_counter() - start
+        if reference is None:
+            reference = (score, move, nodes)
+        assert (score, move, nodes) == reference, "parallel search diverged from the 1-worker result"
+        speedup = curve[0][1] / seconds if curve else 1.0
+        curve.append((workers, seconds, speedup))
+        print(f"{workers:>7} {seconds:>9.2f} {speedup:>8.2f}  {move.uci() if move else '-'}  {score:>6}  {nodes}")
+    return curve
+
+
+def iterative_deepening(state, timeBudget, maxDepth=64, tt=None, executor=None, resume=None, stop=None,
+                        stats=None, on_iteration=None, batch_leaves=False):
+    """
+    Search state at depth 1, 2, 3, ... until timeBudget seconds have passed.
+
+    Each iteration starts with the previous iteration's principal variation,
+    and shares its killer/history tables and transposition table. When the
+    time runs out in the middle of an iteration, that iteration is thrown
+    away and the result of the deepest finished one is returned as
+    (score, best_move, depth). Depth 1 always finishes, so there is a move
+    whenever one exists.
+
+    Iterations run aspiration_search() (principal variation search with
+    late-move reductions and quiescence) in a window around the previous
+    iteration's score. With a process pool executor, every iteration is a
+    parallel_search() that starts from the previous iteration's best move
+    instead; it runs the same pvs() and quiescence() below the root.
+
+    resume is an earlier (score, best_move, depth) result for this same
+    position, e.g. from a Ponderer; the search then carries on from the
+    next depth instead of starting over. Setting the threading.Event stop
+    ends the search early, like running out of time.
+
+    Pass a SearchStats as stats to get the search's counters back. The
+    profiling hook on_iteration(stats) is called after every finished
+    iteration; stats.iterations[-1] describes the iteration just done.
+    batch_leaves=True scores leaf children in batches (see SearchContext).
+    """
+    ctx = SearchContext(tt, stop=stop, batch_leaves=batch_leaves)
+    if stats is not None:
+        ctx.stats = stats
+    tt_probes, tt_hits = (tt.probes, tt.hits) if tt is not None else (0, 0)
+
+    def update_stats():
+        ctx.stats.nodes, ctx.stats.seconds = ctx.nodes, time.perf_counter() - start
+        if tt is not None:
+            ctx.stats.tt_probes, ctx.stats.tt_hits = tt.probes - tt_probes, tt.hits - tt_hits
+
+    root_ply = len(state.board.move_stack)
+    root_player = state.player
+    sign = 1 if root_player else -1  # pvs() scores are for the side to move
+    start = time.perf_counter()
+    if resume is not None:
+        result = resume
+        ctx.pv = [resume[1]]
+    else:
+        result = (state.evaluate(), None, 0)
+
+    for depth in range(result[2] + 1, maxDepth + 1):
+        # The first iteration always finishes, so that there is a move
+        has_move = result[1] is not None
+        ctx.deadline = start + timeBudget if has_move else None
+        ctx.follow_pv = True
+        iteration_start, iteration_nodes = time.perf_counter(), ctx.nodes
+        try:
+            if executor is None:
+                guess = round(result[0] * 100) * sign if result[1] is not None else None
+                score, move = aspiration_search(state, depth, ctx, guess)
+                score = score * sign / 100
+                ctx.pv = ctx.pv_table.get(0, [])
+            else:
+                deadline = time.time() + timeBudget - (time.perf_counter() - start) if has_move else None
+                score, move, nodes = parallel_search(state, depth, executor=executor, deadline=deadline,
+                                                     first_move=result[1], batch_leaves=batch_leaves)
+                ctx.nodes += nodes
+                ctx.pv = [move] if move is not None else []
+        except SearchTimeout:
+            # Take back the moves of the interrupted line
+            while len(state.board.move_stack) > root_ply:
+                state.board.pop()
+            state.player = root_player
+            break
+
+        result = (score, move, depth)
+        ctx.stats.iterations.append({
+            "depth": depth, "nodes": ctx.nodes - iteration_nodes,
+            "seconds": time.perf_counter() - iteration_start,
+            "score": score, "move": move, "pv": list(ctx.pv),
+        })
+        if on_iteration is not None:
+            update_stats()
+            on_iteration(ctx.stats)
+        if move is None or abs(score) >= 1000:
+            break  # Game over at the root, or a forced mate was found
+        if time.perf_counter() - start >= timeBudget or stop is not None and stop.is_set():
+            break
+
+    update_stats()
+    return result
+
+
+class Ponderer:
+    """
+    Searches the AI's answers to the human's likely moves during the
+    human's turn.
+
+    start() runs in a background thread: it picks the `candidates` human
+    moves that look best for the human at a glance and deepens a search of
+    the position after each of them in turn, caching the latest finished
+    (score, best_move, depth) per position. stop() ends the thread and hands
+    back the cached result for the position the human actually reached, to
+    pass as iterative_deepening(resume=...); everything else is dropped.
+    The transposition table is shared, so even a missed prediction leaves
+    useful entries behind.
+    """
+
+    def __init__(self, tt=None, maxDepth=64, candidates=3):
+        self.tt = tt
+        self.maxDepth = maxDepth
+        self.candidates = candidates
+        self.cache = {}  # Zobrist key after the human's move -> (score, best_move, depth)
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self, state):
+        # state: the position with the human to move
+        self.stop()
+        self._stop.clear()
+        if self.tt is not None:
+            self.tt.new_search()
+        board = state.board.copy()  # The thread gets its own board
+        self._thread = threading.Thread(target=self._run, args=(State(board, state.player),), daemon=True)
+        self._thread.start()
+
+    def stop(self, state=None):
+        """
+        Stop pondering. Returns the pondered result for state (the position
+        after the human's move) if it was searched, otherwise None.
+        """
+        if self._thread is None:
+            return None
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        hit = self.cache.get(state.board.zobrist_key()) if state is not None else None
+        self.cache = {}
+        return hit
+
+    def _run(self, state):
+        # Rank the human's moves by a one-ply look, best for the human first
+        ranked = []
+        for move in state.board.generate_legal_moves():
+            state.makeMove(move)
+            ranked.append((state.evaluate(), move))
+            state.unmakeMove()
+        ranked.sort(key=lambda item: item[0], reverse=state.player)
+        contexts = {move: SearchContext(self.tt, stop=self._stop) for _, move in ranked[:self.candidates]}
+
+        try:
+            for depth in range(1, self.maxDepth + 1):
+                for move, ctx in list(contexts.items()):
+                    state.makeMove(move)
+                    ctx.follow_pv = True
+                    guess = self.cache.get(state.board.zobrist_key())
+                    if guess is not None:
+                        guess = round(guess[0] * 100) * (1 if state.player else -1)
+                    score, reply = aspiration_search(state, depth, ctx, guess)
+                    score = score * (1 if state.player else -1) / 100
+                    self.cache[state.board.zobrist_key()] = (score, reply, depth)
+                    ctx.pv = ctx.pv_table.get(0, [])
+                    state.unmakeMove()
+                    if reply is None or abs(score) >= 1000:
+                        del contexts[move]  # Nothing left to deepen
+                if not contexts:
+                    break
+        except SearchTimeout:
+            pass  # stop() was called; the board is this thread's own copy
 
 
 def play_game():
+    # Imported here so that the engine itself (uci_engine.py, selfplay.py)
+    # loads without pygame or a display
+    from chessboard import display
+
     current_state = State(player=True)  # White starts
-    maxDepth = 3  # Try experimenting with the Search depth for more inteligent ai
+    timeBudget = 3.0  # Seconds the AI may think per move
+    maxDepth = 64  # Upper limit on the search depth reached within the budget
+    tt = TranspositionTable(size_mb=64)  # Search results kept between moves
+    workers = 1  # Processes searching root moves in parallel (1 = search in this process)
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        executor = ProcessPoolExecutor(max_workers=workers)
+    else:
+        executor = None
+    ponderer = Ponderer(tt, maxDepth)  # Set to None to leave the AI idle during your turn
+    pondered = None
+    # Opening book built with opening_book.py; the AI plays from it while it can
+    book_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+    book = OpeningBook(book_path) if os.path.exists(book_path) else None
     game_board = display.start()  # Initialize the GUI
 
     print("Artificial Intelligence – Assignment 3")
@@ -265,6 +1500,8 @@ def play_game():
             break
 
         if current_state.player:  # Human move (White)
+            if ponderer is not None and not ponderer.running:
+                ponderer.start(current_state)
             try:
                 move_uci = input("Enter your move (e.g., e2e4, g1f3, a7a8q) or 'quit': ")
 
@@ -277,6 +1514,8 @@ def play_game():
                     new_board = current_state.board.copy()
                     new_board.push(move)
                     current_state = State(new_board, False)
+                    if ponderer is not None:
+                        pondered = ponderer.stop(current_state)
                 else:
                     print("Invalid move! Try again.")
                     continue
@@ -284,12 +1523,23 @@ def play_game():
                 print("Invalid input format! Use UCI format like 'e2e4'.")
                 continue
         else:  # AI move (Black)
+            book_move = book.choose(current_state.board) if book is not None else None
+            if book_move is not None:
+                current_state.makeMove(book_move)
+                print(f"AI plays (book): {book_move.uci()}")
+                pondered = None
+                continue
+
             print("AI is thinking...")
             start_time = time.time()
-            eval_score, best_move = minimax(current_state, 0, float('-inf'), float('inf'), False, maxDepth)
+            tt.new_search()
+            eval_score, best_move, depth = iterative_deepening(current_state, timeBudget, maxDepth, tt, executor,
+                                                               resume=pondered)
             end_time = time.time()
 
-            print(f"AI thought for {end_time - start_time:.2f} seconds")
+            print(f"AI thought for {end_time - start_time:.2f} seconds (depth {depth}"
+                  + (", continued from pondering)" if pondered else ")"))
+            pondered = None
 
             if best_move:
                 new_board = current_state.board.copy()
@@ -321,6 +1571,13 @@ def play_game():
     elif current_state.board.can_claim_draw():
         print("Draw by repetition or 50-move rule!")
 
+    if ponderer is not None:
+        ponderer.stop()
+    if book is not None:
+        book.close()
+    if executor is not None:
+        executor.shutdown()
+
     # Keep the window open for a moment
     time.sleep(3)
     display.terminate()
@@ -1,17 +1,26 @@
 import heapq
+from functools import lru_cache
 from itertools import combinations
 
+
+def _record(stats, expanded):
+    # Hand the number of expanded states to the caller's stats dict, if any
+    if stats is not None:
+        stats["expanded"] = expanded
+
 # --- BFS (Breadth-First Search using Priority Queue - Dijkstra's Algorithm) ---
-def solve_bridge_problem_bfs(crossing_times, time_limit):
+def solve_bridge_problem_bfs(crossing_times, time_limit, stats=None):
     """
     Solves the bridge crossing problem using a priority queue based BFS (Dijkstra's algorithm)
-    to find the path with the minimum total time.
+    to find the path with the minimum total time. If stats is a dict, the number of states
+    expanded is stored in stats["expanded"] (the same for the other searches below).
     """
     all_people = frozenset(crossing_times.keys())
     initial_state = (frozenset(all_people), frozenset(), 'start')  # (start_side, end_side, umbrella_pos)
     
     pq = [(0, [initial_state])]  # (current_time, path_to_state)
     visited_times = {initial_state: 0}  # Track best time to each state
+    expanded = 0
 
     while pq:
         current_time, path = heapq.heappop(pq)
@@ -20,12 +29,14 @@ def solve_bridge_problem_bfs(crossing_times, time_limit):
 
         if not start_side:
             if current_time <= time_limit:
+                _record(stats, expanded)
                 return current_time, path, visited_times
             else:
                 continue  # Continue searching for better path
 
         if current_time > visited_times.get(current_config, float('inf')):
             continue
+        expanded += 1
 
         if umbrella_pos == 'start':
             move_from = start_side
@@ -60,11 +71,12 @@ def solve_bridge_problem_bfs(crossing_times, time_limit):
                     new_path = path + [new_config]
                     heapq.heappush(pq, (new_total_time, new_path))
 
+    _record(stats, expanded)
     return None, None, visited_times
 
 
 # --- DFS (Depth-First Search) Implementation ---
-def solve_bridge_problem_dfs(crossing_times, time_limit):
+def solve_bridge_problem_dfs(crossing_times, time_limit, stats=None):
     """
     Solves the bridge crossing problem using DFS to find the shortest path.
     """
@@ -76,6 +88,7 @@ def solve_bridge_problem_dfs(crossing_times, time_limit):
 
     min_total_time = float('inf')
     best_path = None
+    expanded = 0
 
     while stack:
         current_time, path, current_config = stack.pop()
@@ -92,6 +105,7 @@ def solve_bridge_problem_dfs(crossing_times, time_limit):
 
         if current_time > visited_states.get(current_config, float('inf')):
             continue
+        expanded += 1
 
         if umbrella_pos == 'start':
             move_from = start_side
@@ -129,9 +143,463 @@ def solve_bridge_problem_dfs(crossing_times, time_limit):
         for move in sorted(possible_moves, key=lambda x: x[0], reverse=True):
             stack.append(move)
 
+    _record(stats, expanded)
     return min_total_time if min_total_time != float('inf') else None, best_path, visited_states
 
 
+# --- Bitmask engine (compact states, parent pointers) ---
+def _bridge_people(crossing_times):
+    # People ordered fastest first; person i is bit i of a state
+    return sorted(crossing_times, key=lambda person: (crossing_times[person], person))
+
+
+def _members(state, n):
+    # Indices of the set bits among the low n bits of state, lowest first.
+    # One pass over the binary string, not n shifts of a long int.
+    bits = bin(state & ((1 << n) - 1))[:1:-1]
+    return [i for i, bit in enumerate(bits) if bit == '1']
+
+
+def decode_bridge_state(state, people):
+    """
+    Turns a bitmask state back into the (start_side, end_side, umbrella_pos)
+    tuple used by the other solvers. Bit i set = people[i] is still on the
+    start side; bit len(people) set = the umbrella is on the end side.
+    """
+    start_side = frozenset(people[i] for i in _members(state, len(people)))
+    end_side = frozenset(people) - start_side
+    return start_side, end_side, 'end' if state >> len(people) & 1 else 'start'
+
+
+def _bridge_path(parent, arrival, state, people):
+    # Walk the parent pointers back from state; returns (path, times) in the
+    # format print_bridge_solution expects
+    states = []
+    while state is not None:
+        states.append(state)
+        state = parent[state]
+    states.reverse()
+    path = [decode_bridge_state(s, people) for s in states]
+    return path, {config: arrival[s] for config, s in zip(path, states)}
+
+
+def _trips_to_path(trips, people, times):
+    # Play a schedule of trips (tuples of person indices, alternating forward
+    # and back) from the start state; returns (path, times) like _bridge_path
+    n = len(people)
+    state, elapsed = (1 << n) - 1, 0
+    path = [decode_bridge_state(state, people)]
+    visited_times = {path[0]: 0}
+    for trip in trips:
+        for i in trip:
+            state ^= 1 << i
+        state ^= 1 << n
+        elapsed += max(times[i] for i in trip)
+        path.append(decode_bridge_state(state, people))
+        visited_times[path[-1]] = elapsed
+    return path, visited_times
+
+
+def solve_bridge_problem_bitmask(crossing_times, time_limit, stats=None):
+    """
+    Same answer as solve_bridge_problem_bfs (Dijkstra's algorithm on total
+    time), on a compact encoding: a state is one int holding a bit per person
+    on the start side plus the umbrella bit, and the path is rebuilt from a
+    parent map at the end instead of being copied onto every queue entry.
+
+    Only moves that can appear in an optimal schedule are generated. For
+    groups of up to two, some optimal schedule (Rote, "Crossing the bridge
+    at night", 2002) only ever sends forward the two fastest people
+    overall, the fastest with the slowest one left, or the two slowest
+    ones left, and only ever has one of the two fastest people walk back.
+    The other moves are dominated by these, so the optimum is unchanged,
+    while the states reached are just "how many of the slow people are
+    across" times where the two fastest are, and a hundred people are
+    solved in under a second.
+
+    Returns (total_time, path, visited_times) like the other solvers, where
+    visited_times only covers the states on the path.
+    """
+    people = _bridge_people(crossing_times)
+    times = [crossing_times[person] for person in people]
+    n = len(people)
+    everyone = (1 << n) - 1
+    umbrella = 1 << n
+    start = everyone
+
+    best = {start: 0}
+    parent = {start: None}
+    pq = [(0, start)]
+    expanded = 0
+
+    while pq:
+        current_time, state = heapq.heappop(pq)
+        if current_time > best[state]:
+            continue
+        if not state & everyone:
+            path, visited_times = _bridge_path(parent, best, state, people)
+            _record(stats, expanded)
+            return current_time, path, visited_times
+        expanded += 1
+
+        if state & umbrella:
+            # The faster of people 0 and 1 on the end side brings the umbrella back
+            moves = [(1 << i, times[i]) for i in (0, 1) if i < n and not state >> i & 1][:1]
+        else:
+            here = _members(state, n)
+            if len(here) == 1:
+                moves = [(1 << here[0], times[here[0]])]
+            else:
+                # People are sorted by time, so the slower one sets the pace
+                pairs = [(here[-2], here[-1])]
+                if here[0] == 0:
+                    pairs.append((0, here[-1]))
+                    if here[1] == 1:
+                        pairs.append((0, 1))
+                moves = [((1 << i) | (1 << j), times[j]) for i, j in dict.fromkeys(pairs)]
+
+        for group, trip_time in moves:
+            new_total_time = current_time + trip_time
+            if new_total_time > time_limit:
+                continue
+            new_state = state ^ group ^ umbrella
+            if new_total_time < best.get(new_state, float('inf')):
+                best[new_state] = new_total_time
+                parent[new_state] = state
+                heapq.heappush(pq, (new_total_time, new_state))
+
+    _record(stats, expanded)
+    return None, None, {}
+
+
+# --- Closed form for groups of two ---
+def bridge_greedy_trips(times):
+    """
+    Optimal schedule for groups of up to two, for crossing times sorted
+    fastest first. While more than three people are left, the two slowest
+    get across in one of two ways, whichever is cheaper:
+        fastest two cross, fastest returns, slowest two cross, second
+        fastest returns:                      t[0] + 2 t[1] + t[-1]
+        fastest escorts each of them over:    2 t[0] + t[-2] + t[-1]
+    Returns (total_time, trips), each trip a tuple of indices into times.
+    """
+    trips = []
+    total = 0
+    m = len(times)
+    while m > 3:
+        pair_first = times[0] + 2 * times[1] + times[m - 1]
+        escorts = 2 * times[0] + times[m - 2] + times[m - 1]
+        if pair_first <= escorts:
+            trips += [(0, 1), (0,), (m - 2, m - 1), (1,)]
+            total += pair_first
+        else:
+            trips += [(0, m - 1), (0,), (0, m - 2), (0,)]
+            total += escorts
+        m -= 2
+    if m == 3:
+        trips += [(0, 2), (0,), (0, 1)]
+        total += times[0] + times[1] + times[2]
+    elif m == 2:
+        trips.append((0, 1))
+        total += times[1]
+    elif m == 1:
+        trips.append((0,))
+        total += times[0]
+    return total, trips
+
+
+def solve_bridge_problem_greedy(crossing_times, time_limit):
+    """
+    Closed-form solution for groups of up to two people: O(n log n) for the
+    sort, no search. Returns (total_time, path, visited_times) like the
+    other solvers. Writing out the path takes longer than finding it for
+    large rosters; bridge_greedy_trips() alone gives the total and trips.
+    """
+    people = _bridge_people(crossing_times)
+    times = [crossing_times[person] for person in people]
+    total_time, trips = bridge_greedy_trips(times)
+    if total_time > time_limit:
+        return None, None, {}
+    path, visited_times = _trips_to_path(trips, people, times)
+    return total_time, path, visited_times
+
+
+# --- A* for any bridge capacity ---
+def bridge_lower_bound(state, times, capacity):
+    """
+    Admissible estimate of the time still needed from state. Forward trips
+    carry at most capacity people and cost at least their slowest member,
+    so the remaining people sorted slowest first cost at least every
+    capacity-th time. Every round trip but the last gets only capacity - 1
+    people across net, and each return costs at least the fastest time.
+    """
+    n = len(times)
+    left = [times[i] for i in reversed(_members(state, n))]
+    return _bridge_bound(left, state >> n & 1, times[0] if times else 0, capacity)
+
+
+def _bridge_bound(left, umbrella_at_end, fastest, capacity):
+    # bridge_lower_bound() for the times left on the start side, slowest first
+    if not left:
+        return 0
+    remaining = len(left)
+    returns = 0
+    if umbrella_at_end:
+        # The umbrella has to come back first, with someone on it
+        returns, remaining = 1, remaining + 1
+    if remaining > capacity:
+        returns += -(-(remaining - capacity) // (capacity - 1))
+    return sum(left[::capacity]) + returns * fastest
+
+
+def solve_bridge_problem_astar(crossing_times, time_limit, capacity=2, stats=None):
+    """
+    A* search over bitmask states for a bridge that holds up to capacity
+    people at a time, guided by bridge_lower_bound(). Any group of 1 to
+    capacity people may cross forward; only one person ever walks back, as
+    sending more back never saves time. For capacity 2 the closed-form
+    total is used as an upper bound, so the search only has to confirm it.
+    This is the general fallback: every group is tried, so it suits rosters
+    of a dozen or so people rather than hundreds.
+
+    Returns (total_time, path, visited_times) like the other solvers.
+    """
+    people = _bridge_people(crossing_times)
+    times = [crossing_times[person] for person in people]
+    n = len(people)
+    if capacity < 1:
+        raise ValueError("capacity must be at least 1")
+    if capacity == 1 and n > 1:
+        _record(stats, 0)
+        return None, None, {}  # Nobody could bring the umbrella back usefully
+    bound = time_limit
+    if capacity == 2:
+        bound = min(bound, bridge_greedy_trips(times)[0])
+    everyone = (1 << n) - 1
+    umbrella = 1 << n
+    start = everyone
+
+    best = {start: 0}
+    parent = {start: None}
+    # Ties on the estimate go to the state with more time spent, which is
+    # closer to the goal
+    pq = [(bridge_lower_bound(start, times, capacity), 0, start)]
+    expanded = 0
+
+    while pq:
+        _, current_time, state = heapq.heappop(pq)
+        current_time = -current_time
+        if current_time > best[state]:
+            continue
+        if not state & everyone:
+            path, visited_times = _bridge_path(parent, best, state, people)
+            _record(stats, expanded)
+            return current_time, path, visited_times
+        expanded += 1
+
+        if state & umbrella:
+            moves = [(1 << i, times[i]) for i in _members(~state, n)]
+        else:
+            here = _members(state, n)
+            moves = []
+            for size in range(1, min(capacity, len(here)) + 1):
+                for group in combinations(here, size):
+                    mask = 0
+                    for i in group:
+                        mask |= 1 << i
+                    moves.append((mask, times[group[-1]]))
+
+        for group, trip_time in moves:
+            new_total_time = current_time + trip_time
+            new_state = state ^ group ^ umbrella
+            if new_total_time >= best.get(new_state, float('inf')):
+                continue
+            estimate = new_total_time + bridge_lower_bound(new_state, times, capacity)
+            if estimate > bound:
+                continue
+            best[new_state] = new_total_time
+            parent[new_state] = state
+            heapq.heappush(pq, (estimate, -new_total_time, new_state))
+
+    _record(stats, expanded)
+    return None, None, {}
+
+
+def solve_bridge_problem(crossing_times, time_limit, capacity=2):
+    """
+    Best solver for the job: the closed form for groups of two, A* for any
+    other capacity.
+    """
+    if capacity == 2:
+        return solve_bridge_problem_greedy(crossing_times, time_limit)
+    return solve_bridge_problem_astar(crossing_times, time_limit, capacity)
+
+
+# --- Canonical instances, memoized and batched ---
+BRIDGE_CACHE_SIZE = 4096  # Solved sorted instances kept for solve_bridge_canonical()
+
+
+def _bridge_groups(counts, capacity):
+    # Every multiset of 1..capacity people that can leave a side holding
+    # counts[j] people of the j-th distinct time, as sorted index tuples
+    groups = []
+
+    def extend(group, first, room):
+        for j in range(first, len(counts)):
+            if counts[j] > group.count(j):
+                bigger = group + (j,)
+                groups.append(bigger)
+                if room > 1:
+                    extend(bigger, j, room - 1)
+
+    extend((), 0, capacity)
+    return groups
+
+
+def _canonical_astar(times, capacity):
+    """
+    A* like solve_bridge_problem_astar(), but a state only records how many
+    people of each distinct crossing time are on the start side. People
+    with equal times are interchangeable, so all the states that differ
+    only in which of them stands where are merged into one.
+    Returns (total_time, trips) with trips as tuples of indices into times.
+    """
+    distinct = sorted(set(times))
+    totals = tuple(times.count(t) for t in distinct)
+    fastest = distinct[0]
+
+    def bound(counts, umbrella_at_end):
+        left = [t for t, count in zip(reversed(distinct), reversed(counts)) for _ in range(count)]
+        return _bridge_bound(left, umbrella_at_end, fastest, capacity)
+
+    start = (totals, False)
+    best = {start: 0}
+    parent = {start: None}  # state -> (previous state, group of distinct-time indices)
+    pq = [(bound(*start), 0, start)]
+
+    while pq:
+        _, current_time, state = heapq.heappop(pq)
+        current_time = -current_time
+        if current_time > best[state]:
+            continue
+        counts, umbrella_at_end = state
+        if not any(counts):
+            groups = []
+            while parent[state] is not None:
+                state, group = parent[state]
+                groups.append(group)
+            return current_time, _concrete_trips(groups[::-1], distinct, totals)
+
+        if umbrella_at_end:
+            moves = [(j,) for j in range(len(distinct)) if counts[j] < totals[j]]
+        else:
+            moves = _bridge_groups(counts, capacity)
+        step = 1 if umbrella_at_end else -1
+        for group in moves:
+            new_counts = list(counts)
+            for j in group:
+                new_counts[j] += step
+            new_state = (tuple(new_counts), not umbrella_at_end)
+            new_total_time = current_time + distinct[group[-1]]
+            if new_total_time >= best.get(new_state, float('inf')):
+                continue
+            best[new_state] = new_total_time
+            parent[new_state] = (state, group)
+            heapq.heappush(pq, (new_total_time + bound(*new_state), -new_total_time, new_state))
+
+    return None, None
+
+
+def _concrete_trips(groups, distinct, totals):
+    # Turn groups of distinct-time indices into groups of people indices,
+    # taking the lowest-numbered person of each time that is on that side
+    first = 0
+    sides = []  # [start side, end side] of person indices per distinct time
+    for count in totals:
+        sides.append([list(range(first, first + count)), []])
+        first += count
+    trips = []
+    forward = True
+    for group in groups:
+        trip = []
+        for j in group:
+            here, there = sides[j] if forward else sides[j][::-1]
+            person = min(here)
+            here.remove(person)
+            there.append(person)
+            trip.append(person)
+        trips.append(tuple(trip))
+        forward = not forward
+    return trips
+
+
+def solve_bridge_canonical(times, capacity=2):
+    """
+    Optimal (total_time, trips) for a sequence of crossing times, with no
+    time limit; trips is a tuple of trips, each a tuple of indices into
+    times. The times are sorted before the cached search, so rosters that
+    only differ in names or order share one entry, and a time limit is
+    just a comparison with total_time. (None, None) if there is no
+    solution.
+    """
+    order = sorted(range(len(times)), key=times.__getitem__)
+    total_time, trips = _solve_sorted_times(tuple(times[i] for i in order), capacity)
+    if trips is None:
+        return None, None
+    return total_time, tuple(tuple(order[i] for i in trip) for trip in trips)
+
+
+@lru_cache(maxsize=BRIDGE_CACHE_SIZE)
+def _solve_sorted_times(times, capacity):
+    # solve_bridge_canonical() on sorted times, with trips as tuples so the
+    # cached value cannot be changed by a caller
+    if not times:
+        return 0, ()
+    if capacity == 2:
+        total_time, trips = bridge_greedy_trips(times)
+    elif capacity < 2:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        total_time, trips = (times[0], [(0,)]) if len(times) == 1 else (None, None)
+    else:
+        total_time, trips = _canonical_astar(times, capacity)
+    return total_time, None if trips is None else tuple(tuple(trip) for trip in trips)
+
+
+def solve_bridge_sweep(crossing_times, time_limits, capacity=2):
+    """
+    Solve one roster for each of time_limits with a single search. Returns
+    a list of (total_time, path, visited_times) results, one per limit.
+    """
+    people = _bridge_people(crossing_times)
+    times = tuple(crossing_times[person] for person in people)
+    total_time, trips = solve_bridge_canonical(times, capacity)
+    solved = None
+    results = []
+    for time_limit in time_limits:
+        if total_time is None or total_time > time_limit:
+            results.append((None, None, {}))
+            continue
+        if solved is None:
+            solved = _trips_to_path(trips, people, times)
+        results.append((total_time, solved[0], solved[1]))
+    return results
+
+
+def solve_bridge_batch(rosters, time_limit, capacity=2):
+    """
+    Solve many rosters (dicts of name -> crossing time). time_limit is one
+    limit for all of them or a sequence with one limit per roster. Rosters
+    with the same multiset of times are solved once (see
+    solve_bridge_canonical()); the schedule is mapped back to each
+    roster's names. Returns a list of (total_time, path, visited_times).
+    """
+    rosters = list(rosters)
+    if isinstance(time_limit, (int, float)):
+        time_limit = [time_limit] * len(rosters)
+    return [solve_bridge_sweep(roster, [limit], capacity)[0] for roster, limit in zip(rosters, time_limit)]
+
+
 # --- Utility Function for Printing Solutions ---
 def print_bridge_solution(total_time, path, crossing_times, visited_times_map, algorithm_name):
     """
@@ -183,3 +651,7 @@ if __name__ == "__main__":
     # Solve using DFS
     total_time_dfs, solution_path_dfs, visited_times_dfs_map = solve_bridge_problem_dfs(CROSSING_TIMES, TIME_LIMIT)
     print_bridge_solution(total_time_dfs, solution_path_dfs, CROSSING_TIMES, visited_times_dfs_map, "DFS (with Optimization)")
+
+    # Solve using the bitmask engine
+    total_time_bits, solution_path_bits, visited_times_bits_map = solve_bridge_problem_bitmask(CROSSING_TIMES, TIME_LIMIT)
+    print_bridge_solution(total_time_bits, solution_path_bits, CROSSING_TIMES, visited_times_bits_map, "Bitmask Dijkstra")
@@ -1,5 +1,11 @@
 from collections import deque
 
+
+def _record(stats, expanded):
+    # Hand the number of expanded states to the caller's stats dict, if any
+    if stats is not None:
+        stats["expanded"] = expanded
+
 def get_successors(state):
     successors = []
     s = list(state)
@@ -32,42 +38,264 @@ def get_successors(state):
         
     return successors
 
-def solve_with_bfs(initial_state, goal_state):
+def solve_with_bfs(initial_state, goal_state, stats=None):
     queue = deque([(initial_state, [initial_state])])
     visited = {initial_state}
+    expanded = 0
 
     while queue:
         current_state, path = queue.popleft()
 
         if current_state == goal_state:
+            _record(stats, expanded)
             return path
-        
+        expanded += 1
+
         for successor in get_successors(current_state):
             if successor not in visited:
                 visited.add(successor)
                 new_path = path + [successor]
                 queue.append((successor, new_path))
     
+    _record(stats, expanded)
     return None
 
-def solve_with_dfs(initial_state, goal_state):
+def solve_with_dfs(initial_state, goal_state, stats=None):
     stack = [(initial_state, [initial_state])]
     visited = {initial_state}
+    expanded = 0
 
     while stack:
         current_state, path = stack.pop()
 
         if current_state == goal_state:
+            _record(stats, expanded)
             return path
-        
+        expanded += 1
+
         for successor in get_successors(current_state):
             if successor not in visited:
                 visited.add(successor)
                 new_path = path + [successor]
                 stack.append((successor, new_path))
                 
+    _record(stats, expanded)
     return None
 
+# --- Bit-packed bidirectional solver for any number of rabbits ---
+# A state is one int: two bits per cell ('_' = 0, 'E' = 1, 'W' = 2) from the
+# left, with the index of the empty cell stored above the cells.
+CELL_CODES = {'_': 0, 'E': 1, 'W': 2}
+CELL_NAMES = '_EW'
+EAST, WEST = 1, 2
+
+
+def rabbit_leap_states(n):
+    """Initial and goal tuples for n rabbits on each side."""
+    return ('E',) * n + ('_',) + ('W',) * n, ('W',) * n + ('_',) + ('E',) * n
+
+
+def pack_state(state):
+    packed = 0
+    for i, cell in enumerate(state):
+        packed |= CELL_CODES[cell] << 2 * i
+    return packed | state.index('_') << 2 * len(state)
+
+
+def unpack_state(packed, size):
+    return tuple(CELL_NAMES[packed >> 2 * i & 3] for i in range(size))
+
+
+def _move(packed, size, empty, source):
+    # The rabbit on cell source moves into the empty cell
+    code = packed >> 2 * source & 3
+    cells = (packed ^ code << 2 * source ^ code << 2 * empty) & ((1 << 2 * size) - 1)
+    return cells | source << 2 * size
+
+
+def packed_successors(packed, size):
+    """Successors of a packed state, in the same order as get_successors()."""
+    empty = packed >> 2 * size
+    result = []
+    if empty > 0 and packed >> 2 * (empty - 1) & 3 == EAST:
+        result.append(_move(packed, size, empty, empty - 1))
+    if empty > 1 and packed >> 2 * (empty - 2) & 3 == EAST:
+        result.append(_move(packed, size, empty, empty - 2))
+    if empty < size - 1 and packed >> 2 * (empty + 1) & 3 == WEST:
+        result.append(_move(packed, size, empty, empty + 1))
+    if empty < size - 2 and packed >> 2 * (empty + 2) & 3 == WEST:
+        result.append(_move(packed, size, empty, empty + 2))
+    return result
+
+
+def packed_predecessors(packed, size):
+    # States that packed_successors() turns into packed: the rabbit that
+    # just moved left the cell that is empty now, so it moves back
+    empty = packed >> 2 * size
+    result = []
+    if empty < size - 1 and packed >> 2 * (empty + 1) & 3 == EAST:
+        result.append(_move(packed, size, empty, empty + 1))
+    if empty < size - 2 and packed >> 2 * (empty + 2) & 3 == EAST:
+        result.append(_move(packed, size, empty, empty + 2))
+    if empty > 0 and packed >> 2 * (empty - 1) & 3 == WEST:
+        result.append(_move(packed, size, empty, empty - 1))
+    if empty > 1 and packed >> 2 * (empty - 2) & 3 == WEST:
+        result.append(_move(packed, size, empty, empty - 2))
+    return result
+
+
+def solve_with_bidirectional_bfs(initial_state, goal_state, stats=None):
+    """
+    Returns the same path as solve_with_bfs(), for boards of any size, by
+    searching from both ends with packed states and parent/distance maps.
+
+    solve_with_bfs() returns the shortest path whose successor choices
+    (in get_successors() order) come first lexicographically. The forward
+    search runs in that same order, so the first state of the meeting layer
+    it reaches is where that path crosses over; from there each step takes
+    the first successor that is one step closer to the goal according to
+    the backward search's distances. If stats is a dict, the number of
+    states whose successors or predecessors were generated is stored in
+    stats["expanded"], as in solve_with_bfs().
+    """
+    size = len(initial_state)
+    start, goal = pack_state(initial_state), pack_state(goal_state)
+    parent = {start: None}  # Forward search: state -> state it was reached from
+    goal_distance = {goal: 0}  # Backward search: state -> moves to the goal
+    forward, backward = [start], [goal]
+    forward_depth = backward_depth = 0
+    expanded = 0
+
+    meeting = start if start == goal else None
+    while meeting is None:
+        if not forward or not backward:
+            _record(stats, expanded)
+            return None
+        if len(forward) <= len(backward):
+            expanded += len(forward)
+            layer = []
+            for state in forward:
+                for successor in packed_successors(state, size):
+                    if successor not in parent:
+                        parent[successor] = state
+                        layer.append(successor)
+            forward, forward_depth = layer, forward_depth + 1
+        else:
+            expanded += len(backward)
+            layer = []
+            for state in backward:
+                for predecessor in packed_predecessors(state, size):
+                    if predecessor not in goal_distance:
+                        goal_distance[predecessor] = backward_depth + 1
+                        layer.append(predecessor)
+            backward, backward_depth = layer, backward_depth + 1
+        # The frontiers meet in the forward layer, at backward_depth steps
+        # from the goal; the first such state in search order is the one
+        for state in forward:
+            if goal_distance.get(state) == backward_depth:
+                meeting = state
+                break
+
+    _record(stats, expanded)
+    path = []
+    state = meeting
+    while state is not None:
+        path.append(state)
+        state = parent[state]
+    path.reverse()
+    state = meeting
+    for remaining in range(goal_distance[meeting] - 1, -1, -1):
+        state = next(s for s in packed_successors(state, size) if goal_distance.get(s) == remaining)
+        path.append(state)
+    return [unpack_state(state, size) for state in path]
+
+
+# --- Streaming solution for very large boards ---
+def rabbit_leap_moves(n):
+    """
+    Yield the moves of solve_with_bfs()'s solution for n rabbits a side as
+    (from_index, to_index) pairs, without searching or storing anything.
+
+    The solution has 2n + 1 runs of moves by one color, starting with 'E'
+    and alternating. Run k of the first n has k moves (k - 1 jumps, then a
+    slide), the middle run has n jumps, and the last n runs mirror the
+    first ones (a slide, then jumps). That is (n + 1)^2 - 1 moves, the
+    optimum. The pattern was read off solve_with_bfs()'s paths for small n.
+    """
+    empty = n
+    for run in range(2 * n + 1):
+        step = -1 if run % 2 == 0 else 1  # 'E' moves fill the hole from the left
+        if run < n:
+            distances = [2] * run + [1]
+        elif run == n:
+            distances = [2] * n
+        else:
+            distances = [1] + [2] * (2 * n - run)
+        for distance in distances:
+            source = empty + step * distance
+            yield source, empty
+            empty = source
+
+
+def rabbit_leap_stream(n):
+    """
+    Yield the states of the streamed solution one at a time, starting with
+    the initial state. Memory stays O(n); each state is a fresh tuple, so
+    for very large n prefer rabbit_leap_moves().
+    """
+    board = list(rabbit_leap_states(n)[0])
+    yield tuple(board)
+    for source, target in rabbit_leap_moves(n):
+        board[target], board[source] = board[source], '_'
+        yield tuple(board)
+
+
+def verify_move_stream(moves, initial_state, goal_state):
+    """
+    Check a stream of (from_index, to_index) moves against the rules of
+    get_successors() while it is being read: each move must bring an 'E'
+    one or two cells right, or a 'W' one or two cells left, into the empty
+    cell. Returns the number of moves if the stream ends in goal_state;
+    raises ValueError at the first bad move otherwise.
+    """
+    board = bytearray(''.join(initial_state), 'ascii')
+    empty = board.index(b'_')
+    count = 0
+    for count, (source, target) in enumerate(moves, 1):
+        if target != empty or not 0 <= source < len(board):
+            raise ValueError(f"move {count}: {source}->{target} does not move into the empty cell {empty}")
+        rabbit = chr(board[source])
+        if not (rabbit == 'E' and target - source in (1, 2) or rabbit == 'W' and source - target in (1, 2)):
+            raise ValueError(f"move {count}: {rabbit!r} cannot move {source}->{target}")
+        board[target], board[source] = board[source], ord('_')
+        empty = source
+    if board.decode('ascii') != ''.join(goal_state):
+        raise ValueError(f"after {count} moves the board is not the goal")
+    return count
+
+
+def write_moves(moves, path):
+    """Write (from_index, to_index) moves to a text file, one 'from to' per line."""
+    count = 0
+
+    def lines():
+        nonlocal count
+        for count, (source, target) in enumerate(moves, 1):
+            yield f"{source} {target}\n"
+
+    with open(path, 'w') as handle:
+        handle.writelines(lines())
+    return count
+
+
+def read_moves(path):
+    """Stream the moves back from a file written by write_moves()."""
+    with open(path) as handle:
+        for line in handle:
+            source, target = line.split()
+            yield int(source), int(target)
+
+
 def print_path(path):
     if path:
         print(f"Solution found in {len(path) - 1} moves:")
@@ -90,4 +318,10 @@ if __name__ == "__main__":
 
     print("🔎 Searching with Depth-First Search (DFS)...")
     dfs_path = solve_with_dfs(initial, goal)
-    print_path(dfs_path)
\ No newline at end of file
+    print_path(dfs_path)
+
+    print("\n" + "="*40 + "\n")
+
+    print("🔎 Searching with bidirectional BFS (bit-packed states)...")
+    bidirectional_path = solve_with_bidirectional_bfs(initial, goal)
+    print_path(bidirectional_path)
@@ -0,0 +1,198 @@
+"""
+Batched evaluation for the Assignment 3 chess AI.
+
+Scores many positions with one set of NumPy operations instead of one
+State.evaluate() call each. Every board becomes a row of 64-bit bitboards
+(one per piece type and color) and the scalar evaluation is replayed on
+whole columns at once:
+
+  material + piece-square  the piece bitboards unpacked into 0/1 planes and
+                           multiplied with Assignment3.PIECE_SQUARE
+  mobility, king safety    Assignment3.attack_masks() itself, run on uint64
+                           arrays instead of Python ints (the shifts and
+                           masks work unchanged on both)
+
+The result equals [State(board, board.turn).evaluate() for board in boards]
+exactly, checkmates and draws included. Terminal positions are rare, so they
+are found with a few more bitboard tests (a safe king move, a free pawn push
+or knight move means the side to move is neither mated nor stalemated); only
+the rows those tests can't decide go back to python-chess one by one.
+
+    from batch_eval import evaluate_boards
+    scores = evaluate_boards(chess.Board(fen) for fen in fens)
+"""
+
+import chess
+import numpy as np
+
+from Assignment3 import (BB_ALL, DIAGONAL_STEPS, KING_ZONE_WEIGHT, KNIGHT_STEPS, MOBILITY_WEIGHT,
+                         ORTHOGONAL_STEPS, PIECE_SQUARE, _king_zone, _shift, _slide, attack_masks)
+
+PIECE_TYPES = (chess.PAWN, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN, chess.KING)
+
+# Row i * 64 + square of the piece-square weights, i = 6 * white + piece_type - 1,
+# matching the bit planes that PackedBoards.piece_planes() unpacks
+PIECE_SQUARE_WEIGHTS = np.array([PIECE_SQUARE[white][piece_type][square]
+                                 for white in (False, True)
+                                 for piece_type in PIECE_TYPES
+                                 for square in chess.SQUARES], dtype=np.int64)
+
+
+def _row(board):
+    # The fields of one board that the batch evaluation reads
+    return (board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings,
+            board.occupied_co[chess.BLACK], board.occupied_co[chess.WHITE], board.turn,
+            min(board.halfmove_clock, len(board.move_stack)), board.halfmove_clock)
+
+
+class PackedBoards:
+    """
+    Many positions as NumPy columns, with the same attribute names as
+    chess.Board (pawns, knights, ..., occupied, occupied_co) so that the
+    bitboard helpers in Assignment3 accept it as a board.
+    """
+
+    def __init__(self, rows):
+        columns = list(zip(*rows)) if rows else [()] * 11
+        (self.pawns, self.knights, self.bishops, self.rooks, self.queens, self.kings,
+         black, white) = (np.array(column, dtype=np.uint64) for column in columns[:8])
+        self.occupied_co = [black, white]
+        self.occupied = black | white
+        self.turn = np.array(columns[8], dtype=bool)
+        self.reversible_plies = np.array(columns[9], dtype=np.int64)  # Plies a repetition can reach back
+        self.halfmove_clock = np.array(columns[10], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.turn)
+
+    def with_occupied(self, occupied):
+        # Same pieces, different occupancy (for x-ray attacks through a king)
+        view = object.__new__(PackedBoards)
+        view.__dict__.update(self.__dict__)
+        view.occupied = occupied
+        return view
+
+    def piece_planes(self):
+        # (boards, 12 * 64) array of 0/1, one plane per piece type and color
+        planes = np.stack([bitboard & color
+                           for color in (self.occupied_co[chess.BLACK], self.occupied_co[chess.WHITE])
+                           for bitboard in (self.pawns, self.knights, self.bishops,
+                                            self.rooks, self.queens, self.kings)], axis=1)
+        as_bytes = planes.astype("<u8").view(np.uint8).reshape(len(self), 12, 8)
+        return np.unpackbits(as_bytes, axis=-1, bitorder="little").reshape(len(self), 12 * 64)
+
+
+def _popcount(bitboards):
+    return np.bitwise_count(bitboards).astype(np.int64)
+
+
+def _vector_scores(packed):
+    """
+    Centipawn scores (White positive) of every row before terminal checks,
+    plus what the batch could decide about them: has_moves is True where
+    the side to move surely has a legal move, in_check where it is in check.
+    """
+    score = packed.piece_planes() @ PIECE_SQUARE_WEIGHTS
+
+    white = packed.occupied_co[chess.WHITE]
+    black = packed.occupied_co[chess.BLACK]
+    white_pieces, white_all = attack_masks(packed, chess.WHITE)
+    black_pieces, black_all = attack_masks(packed, chess.BLACK)
+    score += MOBILITY_WEIGHT * (_popcount(white_pieces & ~white) - _popcount(black_pieces & ~black))
+    score -= KING_ZONE_WEIGHT * _popcount(_king_zone(packed.kings & white) & black_all)
+    score += KING_ZONE_WEIGHT * _popcount(_king_zone(packed.kings & black) & white_all)
+
+    turn = packed.turn
+    ours = np.where(turn, white, black)
+    king = packed.kings & ours
+    in_check = (king & np.where(turn, black_all, white_all)) != 0
+
+    # A king move to a square the enemy does not attack is always legal;
+    # enemy attacks are taken with the king lifted off the board so that a
+    # slider's ray through the king counts
+    lifted = packed.with_occupied(packed.occupied & ~king)
+    enemy_xray = np.where(turn, attack_masks(lifted, chess.BLACK)[1], attack_masks(lifted, chess.WHITE)[1])
+    has_moves = (_king_zone(king) & ~ours & ~enemy_xray) != 0
+
+    # Out of check, a pawn push or knight move is legal for a piece that is
+    # on no line through its king, since such a piece cannot be pinned
+    free = ours & ~_slide(king, BB_ALL, ORTHOGONAL_STEPS + DIAGONAL_STEPS)
+    empty = BB_ALL & ~packed.occupied
+    pawns = packed.pawns & free
+    pushes = np.where(turn, _shift(pawns, 8, BB_ALL), _shift(pawns, -8, BB_ALL)) & empty
+    knights = packed.knights & free
+    jumps = np.zeros_like(knights)
+    for shift, mask in KNIGHT_STEPS:
+        jumps |= _shift(knights, shift, mask)
+    has_moves |= ~in_check & ((pushes | (jumps & ~ours)) != 0)
+
+    return score, has_moves, in_check
+
+
+def _is_draw(board):
+    # Draw by rule for a board that has a legal move
+    if hasattr(board, "is_rule_draw"):
+        return board.is_rule_draw()
+    return board.halfmove_clock >= 100 or board.is_repetition(3) or board.is_insufficient_material()
+
+
+def _finish(packed, on_board):
+    """
+    Scores in pawns, White positive, for the rows of packed. on_board(index,
+    function) calls function with the board of row index for the rare rows
+    that need python-chess.
+    """
+    score, has_moves, in_check = _vector_scores(packed)
+    for index in np.flatnonzero(~has_moves):
+        has_moves[index] = on_board(index, lambda board: any(board.generate_legal_moves()))
+
+    # Draw rules: fifty moves is decided here; repetition needs eight
+    # reversible plies and insufficient material needs pawns, rooks and
+    # queens gone, and only those rows are checked on the board
+    draw = has_moves & (packed.halfmove_clock >= 100)
+    heavy = packed.pawns | packed.rooks | packed.queens
+    unsure = has_moves & ~draw & ((packed.reversible_plies >= 8) | (heavy == 0))
+    for index in np.flatnonzero(unsure):
+        draw[index] = on_board(index, _is_draw)
+
+    result = score / 100
+    result[draw] = 0
+    result[~has_moves & ~in_check] = 0  # Stalemate
+    mated = ~has_moves & in_check
+    result[mated] = np.where(packed.turn[mated], -1000, 1000)
+    return result
+
+
+def evaluate_boards(boards):
+    """
+    Evaluate boards (chess.Board or SearchBoard) in one batch. Returns a
+    float array equal to State(board, board.turn).evaluate() for each.
+    """
+    boards = list(boards)
+    packed = PackedBoards([_row(board) for board in boards])
+    return _finish(packed, lambda index, function: function(boards[index]))
+
+
+def evaluate_children(state, moves=None):
+    """
+    Evaluate the position after each of moves (default: every legal move)
+    in one batch, playing them on state's own board. Returns a float array
+    equal to [child.evaluate() for child in state.moveGen()] in move order.
+    """
+    board = state.board
+    if moves is None:
+        moves = list(board.generate_legal_moves())
+    rows = []
+    for move in moves:
+        board.push(move)
+        rows.append(_row(board))
+        board.pop()
+
+    def on_board(index, function):
+        board.push(moves[index])
+        try:
+            return function(board)
+        finally:
+            board.pop()
+
+    return _finish(PackedBoards(rows), on_board)
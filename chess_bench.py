@@ -0,0 +1,156 @@
+"""
+Benchmark suite for the Assignment 3 chess AI.
+
+Runs a fixed set of positions through three measurements and prints numbers
+that can be compared between versions of the code:
+
+  perft    counts leaf nodes of the legal move tree to a fixed depth, once
+           with State.moveGen (board copies) and once with make/unmake, and
+           checks the counts against the published values
+  evaluate times State.evaluate on every position, and the same positions
+           scored in one batch_eval.evaluate_boards call
+  search   runs a fixed-depth minimax_inplace search on every position and
+           reports nodes, nodes per second, cutoff and TT statistics
+
+    python chess_bench.py [--perft-depth 3] [--search-depth 3] [--json results.json]
+
+Node counts are deterministic, so a change in them means the search itself
+changed; the timings show speed regressions.
+"""
+
+import argparse
+import json
+import time
+
+import chess
+
+from Assignment3 import SearchContext, State, TranspositionTable, minimax_inplace
+from batch_eval import evaluate_boards
+
+# Standard perft test positions with their known leaf counts by depth
+BENCH_POSITIONS = [
+    ("startpos", chess.STARTING_FEN, [20, 400, 8902, 197281]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", [48, 2039, 97862]),
+    ("endgame", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238]),
+    ("promotions", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", [6, 264, 9467]),
+    ("middlegame", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379]),
+]
+
+
+def perft_copy(state, depth):
+    # Leaf count through State.moveGen, which copies the board per move
+    if depth == 0:
+        return 1
+    return sum(perft_copy(child, depth - 1) for child in state.moveGen())
+
+
+def perft(state, depth):
+    # Leaf count through makeMove/unmakeMove on a single board; the last ply
+    # is counted without being played
+    if depth == 1:
+        return state.board.legal_moves.count()
+    nodes = 0
+    for move in state.board.generate_legal_moves():
+        state.makeMove(move)
+        nodes += perft(state, depth - 1)
+        state.unmakeMove()
+    return nodes
+
+
+def make_state(fen):
+    board = chess.Board(fen)
+    return State(board, board.turn)
+
+
+def bench_perft(depth):
+    rows = []
+    for name, fen, expected in BENCH_POSITIONS:
+        d = min(depth, len(expected))
+        row = {"position": name, "depth": d}
+        for label, function in (("copy", perft_copy), ("make_unmake", perft)):
+            start = time.perf_counter()
+            nodes = function(make_state(fen), d)
+            seconds = time.perf_counter() - start
+            if nodes != expected[d - 1]:
+                raise AssertionError(f"perft({name}, {d}) with {label}: {nodes}, expected {expected[d - 1]}")
+            row["nodes"] = nodes
+            row[label + "_seconds"] = seconds
+            row[label + "_nps"] = nodes / seconds if seconds > 0 else 0.0
+        rows.append(row)
+    return rows
+
+
+def bench_evaluate(repeat):
+    rows = []
+    for name, fen, _ in BENCH_POSITIONS:
+        state = make_state(fen)
+        state.evaluate()  # Fill the board's running totals outside the timing
+        start = time.perf_counter()
+        for _ in range(repeat):
+            state.evaluate()
+        seconds = time.perf_counter() - start
+        boards = [state.board] * repeat
+        start = time.perf_counter()
+        evaluate_boards(boards)
+        batch_seconds = time.perf_counter() - start
+        rows.append({"position": name, "calls": repeat, "microseconds_per_call": seconds / repeat * 1e6,
+                     "batch_microseconds_per_board": batch_seconds / repeat * 1e6})
+    return rows
+
+
+def bench_search(depth, hash_mb):
+    rows = []
+    for name, fen, _ in BENCH_POSITIONS:
+        state = make_state(fen)
+        tt = TranspositionTable(hash_mb)
+        ctx = SearchContext(tt)
+        start = time.perf_counter()
+        score, move = minimax_inplace(state, 0, float("-inf"), float("inf"), state.player, depth, tt, ctx)
+        stats = ctx.stats
+        stats.nodes, stats.seconds = ctx.nodes, time.perf_counter() - start
+        stats.tt_probes, stats.tt_hits = tt.probes, tt.hits
+        rows.append({"position": name, "depth": depth, "move": move.uci() if move else None, "score": score,
+                     "nodes": stats.nodes, "seconds": stats.seconds, "nps": stats.nps,
+                     "cutoff_rate": stats.cutoff_rate, "first_move_cutoff_rate": stats.first_move_cutoff_rate,
+                     "tt_hit_rate": stats.tt_hit_rate})
+    return rows
+
+
+def print_table(title, rows):
+    print(f"\n{title}")
+    columns = list(rows[0])
+    print("  ".join(f"{column:>14}" for column in columns))
+    for row in rows:
+        cells = []
+        for column in columns:
+            value = row[column]
+            cells.append(f"{value:>14.4g}" if isinstance(value, float) else f"{str(value):>14}")
+        print("  ".join(cells))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark move generation, evaluation and search.")
+    parser.add_argument("--perft-depth", type=int, default=3)
+    parser.add_argument("--search-depth", type=int, default=3)
+    parser.add_argument("--eval-repeat", type=int, default=2000)
+    parser.add_argument("--hash", type=int, default=64, help="transposition table size in MB")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    results = {
+        "perft": bench_perft(args.perft_depth),
+        "evaluate": bench_evaluate(args.eval_repeat),
+        "search": bench_search(args.search_depth, args.hash),
+    }
+    print_table("perft (leaf counts checked against known values)", results["perft"])
+    print_table("evaluate", results["evaluate"])
+    print_table(f"search at depth {args.search_depth}", results["search"])
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1137 @@
+"""
+Grid pathfinding for large maps (Assignment 2).
+
+Same searches as a_star and best_first_search in assignment_2.ipynb, with the
+same (length, path) result, rebuilt so that they scale to big grids:
+
+  - cells are flat integer ids (row * width + col) instead of (x, y) tuples
+  - which of the 8 MOVES lead to an open cell is worked out once for the
+    whole grid with NumPy and stored as one byte per cell
+  - g-scores, parents and closed flags live in flat arrays, not dicts/sets
+
+jump_point_search is a third option: A* that jumps along straight and
+diagonal lines and only stops at cells where the best path may turn, so
+open areas cost a handful of heap operations instead of one per cell.
+It pays off on open maps with walls and rooms; on scattered noise nearly
+every cell has a forced neighbour and plain a_star is as quick.
+
+GridRouter is for many queries with arbitrary endpoints on the same grid:
+landmark (ALT) heuristics and cached distance fields, see its docstring.
+HierarchicalGrid plans on grids kept in a file (write_grid_file) that is
+memory-mapped rather than loaded, for maps too large to hold in memory.
+DStarLite keeps its search between plans and repairs it when cells change.
+
+The grid can be a list of lists, as in the notebook, or any 2-D NumPy array
+(0 = free, anything else = blocked). A 4096 x 4096 grid needs about 10 bytes
+per cell in total.
+
+The heuristic differs from the notebook's on purpose. Every move there costs
+1, diagonals included, so the true distance between cells is the Chebyshev
+distance max(|dx|, |dy|) -- the octile distance with a diagonal cost of 1.
+The notebook's Euclidean distance can be larger than that, which lets A*
+return a longer path; with heuristic() below A* is always optimal. Path
+lengths can therefore be shorter than the notebook's a_star on some grids,
+and among equally short paths a different one may be returned.
+"""
+
+import heapq
+import re
+import struct
+from collections import OrderedDict, defaultdict
+from array import array
+
+import numpy as np
+
+# 8 possible moves (horizontal, vertical, diagonal), as in the notebook
+MOVES = [(-1, -1), (-1, 0), (-1, 1),
+         (0, -1),          (0, 1),
+         (1, -1),  (1, 0), (1, 1)]
+
+MOVE_BIT = {move: k for k, move in enumerate(MOVES)}  # Bit of each move in a neighbour mask
+
+UNREACHED = 2 ** 31 - 1  # g-score of a cell no path has reached yet
+INF = float("inf")
+
+
+def heuristic(a, b):
+    # Octile distance with unit-cost diagonals (the Chebyshev distance)
+    return max(abs(a[0] - b[0]), abs(a[1] - b[1]))
+
+
+class Grid:
+    """
+    A grid prepared for searching: flat cell ids, and for every cell a byte
+    whose bit k is set when MOVES[k] from it stays on the grid and lands on
+    a free cell.
+    """
+
+    def __init__(self, grid):
+        if isinstance(grid, Grid):
+            grid = grid.blocked
+        self.blocked = np.asarray(grid) != 0
+        if self.blocked.ndim != 2:
+            raise ValueError("grid must be two-dimensional")
+        self.height, self.width = self.blocked.shape
+        self.size = self.height * self.width
+        self.offsets = [dx * self.width + dy for dx, dy in MOVES]  # Flat id step of each move
+
+        free = np.pad(~self.blocked, 1)  # A ring of blocked cells stands in for the border
+        masks = np.zeros(self.blocked.shape, dtype=np.uint8)
+        for k, (dx, dy) in enumerate(MOVES):
+            masks |= free[1 + dx:1 + dx + self.height, 1 + dy:1 + dy + self.width].astype(np.uint8) << k
+        masks[self.blocked] = 0
+        self.neighbour_masks = masks.tobytes()  # bytes: indexing yields plain ints, fast in a loop
+        self._jump_lanes = None
+
+    def jump_lanes(self):
+        # Built on first use by jump_point_search, then kept with the grid
+        if self._jump_lanes is None:
+            self._jump_lanes = JumpLanes(self)
+        return self._jump_lanes
+
+    def node(self, cell):
+        return cell[0] * self.width + cell[1]
+
+    def cell(self, node):
+        return divmod(node, self.width)
+
+    def is_free(self, cell):
+        return 0 <= cell[0] < self.height and 0 <= cell[1] < self.width and not self.blocked[cell]
+
+    def neighbours(self, node):
+        mask = self.neighbour_masks[node]
+        return [node + offset for k, offset in enumerate(self.offsets) if mask >> k & 1]
+
+    def path(self, parent, end):
+        # Follow parent ids back from end; returns the path as (x, y) cells
+        nodes = [end]
+        while parent[end] != -1:
+            end = parent[end]
+            nodes.append(end)
+        nodes.reverse()
+        return [self.cell(node) for node in nodes]
+
+
+def _record(stats, expanded):
+    # Hand the number of expanded cells to the caller's stats dict, if any
+    if stats is not None:
+        stats["expanded"] = expanded
+
+
+def _endpoints(grid, start, goal):
+    start = (0, 0) if start is None else tuple(start)
+    goal = (grid.height - 1, grid.width - 1) if goal is None else tuple(goal)
+    return start, goal
+
+
+def a_star(grid, start=None, goal=None, stats=None):
+    """
+    A* from start to goal (default: top-left to bottom-right corner, as in
+    the notebook). grid is a list of lists, a NumPy array or a Grid.
+    Returns (length, path) with length = number of cells on the path, or
+    (-1, []) if the goal cannot be reached. If stats is a dict, the number
+    of cells expanded is stored in stats["expanded"] (the same for the
+    other searches below).
+    """
+    grid = grid if isinstance(grid, Grid) else Grid(grid)
+    start, goal = _endpoints(grid, start, goal)
+    if not grid.is_free(start) or not grid.is_free(goal):
+        return -1, []
+
+    width, masks, offsets = grid.width, grid.neighbour_masks, grid.offsets
+    goal_x, goal_y = goal
+    start_node, goal_node = grid.node(start), grid.node(goal)
+    g = array('i', [UNREACHED]) * grid.size
+    parent = array('i', [-1]) * grid.size
+    closed = bytearray(grid.size)
+    g[start_node] = 0
+
+    # (f, -g, node): among equal f, the cell furthest along is taken first
+    OPEN = [(heuristic(start, goal), 0, start_node)]
+    expanded = 0
+    while OPEN:
+        _, g_curr, node = heapq.heappop(OPEN)
+        if node == goal_node:
+            path = grid.path(parent, node)
+            _record(stats, expanded)
+            return len(path), path
+        if closed[node]:
+            continue
+        closed[node] = 1
+        expanded += 1
+
+        g_next = 1 - g_curr  # g_curr is stored negated
+        mask = masks[node]
+        k = 0
+        while mask:
+            if mask & 1:
+                neighbour = node + offsets[k]
+                if g_next < g[neighbour]:
+                    g[neighbour] = g_next
+                    parent[neighbour] = node
+                    x, y = divmod(neighbour, width)
+                    h = max(abs(x - goal_x), abs(y - goal_y))
+                    heapq.heappush(OPEN, (g_next + h, -g_next, neighbour))
+            mask >>= 1
+            k += 1
+
+    _record(stats, expanded)
+    return -1, []
+
+
+def best_first_search(grid, start=None, goal=None, stats=None):
+    """
+    Greedy best-first search, ordered by straight-line distance to the goal
+    like the notebook's version (squared, which orders cells the same way
+    without a square root), so it returns the same path as the notebook.
+    """
+    grid = grid if isinstance(grid, Grid) else Grid(grid)
+    start, goal = _endpoints(grid, start, goal)
+    if not grid.is_free(start) or not grid.is_free(goal):
+        return -1, []
+
+    width, masks, offsets = grid.width, grid.neighbour_masks, grid.offsets
+    goal_x, goal_y = goal
+    goal_node = grid.node(goal)
+    parent = array('i', [-1]) * grid.size
+    visited = bytearray(grid.size)
+
+    start_node = grid.node(start)
+    OPEN = [((start[0] - goal_x) ** 2 + (start[1] - goal_y) ** 2, start_node)]
+    expanded = 0
+    while OPEN:
+        _, node = heapq.heappop(OPEN)
+        if node == goal_node:
+            path = grid.path(parent, node)
+            _record(stats, expanded)
+            return len(path), path
+        if visited[node]:
+            continue
+        visited[node] = 1
+        expanded += 1
+
+        mask = masks[node]
+        for k, offset in enumerate(offsets):
+            if mask >> k & 1:
+                neighbour = node + offset
+                if not visited[neighbour]:
+                    parent[neighbour] = node
+                    x, y = divmod(neighbour, width)
+                    heapq.heappush(OPEN, ((x - goal_x) ** 2 + (y - goal_y) ** 2, neighbour))
+
+    _record(stats, expanded)
+    return -1, []
+
+
+# --- Jump Point Search ---
+
+def _sign(value):
+    return (value > 0) - (value < 0)
+
+
+def _pruned_moves():
+    """
+    For every direction of travel (index into MOVES), the moves still worth
+    trying from a cell reached that way: the natural ones, and forced ones
+    as (blocked move, forced move) pairs -- the forced move is tried only if
+    the blocked move's cell is a wall. Diagonal moves may cut corners, as
+    they may in MOVES, so only the cell beside the parent can force one.
+    """
+    table = []
+    for dx, dy in MOVES:
+        if dx and dy:
+            natural = [(dx, 0), (0, dy), (dx, dy)]
+            forced = [((-dx, 0), (-dx, dy)), ((0, -dy), (dx, -dy))]
+        elif dx:
+            natural = [(dx, 0)]
+            forced = [((0, side), (dx, side)) for side in (-1, 1)]
+        else:
+            natural = [(0, dy)]
+            forced = [((side, 0), (side, dy)) for side in (-1, 1)]
+        table.append(([MOVE_BIT[move] for move in natural],
+                      [(MOVE_BIT[blocked], MOVE_BIT[move]) for blocked, move in forced]))
+    return table
+
+
+PRUNED_MOVES = _pruned_moves()
+
+
+def _has_forced(mask, forced):
+    return any(not mask >> blocked & 1 and mask >> move & 1 for blocked, move in forced)
+
+
+STOP = re.compile(b"[\\x01\\x02]")  # A lane byte where a straight jump ends
+
+
+class JumpLanes:
+    """
+    Where straight jumps end, precomputed for the whole grid so that one
+    jump is a single byte search instead of a Python loop over cells. For
+    each straight move there is a buffer with one byte per cell, laid out
+    so that the cells met along that move are consecutive: 1 marks a cell
+    with a forced neighbour (a jump point), 2 a cell the move cannot leave,
+    0 anything else.
+    """
+
+    def __init__(self, grid):
+        masks = np.frombuffer(grid.neighbour_masks, dtype=np.uint8).reshape(grid.height, grid.width)
+        height, width = grid.height, grid.width
+        self.lanes = {}
+        for k, (dx, dy) in enumerate(MOVES):
+            if dx and dy:
+                continue
+            forced = np.zeros(masks.shape, dtype=bool)
+            for blocked, move in PRUNED_MOVES[k][1]:
+                forced |= (masks >> blocked & 1 == 0) & (masks >> move & 1 == 1)
+            stops = np.where(forced, 1, np.where(masks >> k & 1 == 1, 0, 2)).astype(np.uint8)
+            # Buffer, and the position of cell (x, y) in it
+            if dy == 1:
+                self.lanes[k] = stops.tobytes(), lambda x, y: x * width + y
+            elif dy == -1:
+                self.lanes[k] = stops[:, ::-1].tobytes(), lambda x, y: x * width + width - 1 - y
+            elif dx == 1:
+                self.lanes[k] = stops.T.tobytes(), lambda x, y: y * height + x
+            else:
+                self.lanes[k] = stops[::-1].T.tobytes(), lambda x, y: y * height + height - 1 - x
+
+
+def _straight_jump(grid, node, k, goal):
+    # Jump from node along straight move k; returns the cell id the jump
+    # stops at, or -1 if it runs into a wall or the border first
+    if not grid.neighbour_masks[node] >> k & 1:
+        return -1
+    buffer, position = grid.jump_lanes().lanes[k]
+    x, y = divmod(node, grid.width)
+    start = position(x, y)
+    steps = STOP.search(buffer, start + 1).start() - start
+    dx, dy = MOVES[k]
+    goal_x, goal_y = goal
+    if (goal_x == x if dx == 0 else goal_y == y) and 0 < (goal_x - x) * dx + (goal_y - y) * dy <= steps:
+        return grid.node(goal)
+    return node + steps * grid.offsets[k] if buffer[start + steps] == 1 else -1
+
+
+def _jump(grid, node, k, goal):
+    """
+    Walk from node in direction MOVES[k] until a cell that must be expanded
+    (the goal, or one with a forced neighbour, or -- for a diagonal -- one
+    from which a straight jump finds such a cell). Returns that cell's id,
+    or -1 if a wall or the border comes first.
+    """
+    natural, forced = PRUNED_MOVES[k]
+    if len(natural) == 1:
+        return _straight_jump(grid, node, k, goal)
+
+    masks, offset = grid.neighbour_masks, grid.offsets[k]
+    goal_node = grid.node(goal)
+    while masks[node] >> k & 1:
+        node += offset
+        if node == goal_node or _has_forced(masks[node], forced):
+            return node
+        for s in natural[:2]:
+            if _straight_jump(grid, node, s, goal) != -1:
+                return node
+    return -1
+
+
+def _interpolate(grid, jump_points):
+    # Fill in the cells between consecutive jump points, which always lie
+    # on one straight or diagonal line
+    path = [grid.cell(jump_points[0])]
+    for node in jump_points[1:]:
+        x, y = path[-1]
+        to_x, to_y = grid.cell(node)
+        dx, dy = _sign(to_x - x), _sign(to_y - y)
+        for _ in range(max(abs(to_x - x), abs(to_y - y))):
+            x, y = x + dx, y + dy
+            path.append((x, y))
+    return path
+
+
+def jump_point_search(grid, start=None, goal=None, stats=None):
+    """
+    Jump Point Search (Harabor and Grastien): A* over the same 8 MOVES with
+    the same unit costs, returning a path as short as a_star's in the same
+    (length, path) form, but expanding only jump points.
+    """
+    grid = grid if isinstance(grid, Grid) else Grid(grid)
+    start, goal = _endpoints(grid, start, goal)
+    if not grid.is_free(start) or not grid.is_free(goal):
+        return -1, []
+
+    width, masks = grid.width, grid.neighbour_masks
+    goal_x, goal_y = goal
+    start_node, goal_node = grid.node(start), grid.node(goal)
+    g = array('i', [UNREACHED]) * grid.size
+    parent = array('i', [-1]) * grid.size
+    closed = bytearray(grid.size)
+    g[start_node] = 0
+
+    OPEN = [(heuristic(start, goal), 0, start_node)]
+    expanded = 0
+    while OPEN:
+        _, g_curr, node = heapq.heappop(OPEN)
+        if node == goal_node:
+            jump_points = [node]
+            while parent[node] != -1:
+                node = parent[node]
+                jump_points.append(node)
+            path = _interpolate(grid, jump_points[::-1])
+            _record(stats, expanded)
+            return len(path), path
+        if closed[node]:
+            continue
+        closed[node] = 1
+        expanded += 1
+
+        x, y = divmod(node, width)
+        mask = masks[node]
+        if parent[node] == -1:
+            directions = [k for k in range(len(MOVES)) if mask >> k & 1]
+        else:
+            from_x, from_y = divmod(parent[node], width)
+            natural, forced = PRUNED_MOVES[MOVE_BIT[(_sign(x - from_x), _sign(y - from_y))]]
+            directions = [k for k in natural if mask >> k & 1]
+            directions += [move for blocked, move in forced if not mask >> blocked & 1 and mask >> move & 1]
+
+        for k in directions:
+            jump_point = _jump(grid, node, k, goal)
+            if jump_point == -1:
+                continue
+            jx, jy = divmod(jump_point, width)
+            g_next = -g_curr + max(abs(jx - x), abs(jy - y))
+            if g_next < g[jump_point]:
+                g[jump_point] = g_next
+                parent[jump_point] = node
+                h = max(abs(jx - goal_x), abs(jy - goal_y))
+                heapq.heappush(OPEN, (g_next + h, -g_next, jump_point))
+
+    _record(stats, expanded)
+    return -1, []
+
+
+# --- Many queries on one grid ---
+
+def distance_field(grid, cell):
+    """
+    Moves from cell to every cell of the grid (-1 where unreachable), as a
+    flat int32 array indexed by cell id. Breadth-first search run a whole
+    frontier at a time with NumPy; moves are symmetric, so it is also every
+    cell's distance to cell.
+    """
+    grid = grid if isinstance(grid, Grid) else Grid(grid)
+    masks = np.frombuffer(grid.neighbour_masks, dtype=np.uint8)
+    distance = np.full(grid.size, -1, dtype=np.int32)
+    if not grid.is_free(cell):
+        return distance
+    frontier = np.array([grid.node(cell)], dtype=np.int64)
+    distance[frontier] = 0
+    steps = 0
+    while frontier.size:
+        steps += 1
+        frontier_masks = masks[frontier]
+        reached = np.concatenate([frontier[frontier_masks >> k & 1 == 1] + offset
+                                  for k, offset in enumerate(grid.offsets)])
+        frontier = np.unique(reached[distance[reached] == -1])
+        distance[frontier] = steps
+    return distance
+
+
+class GridRouter:
+    """
+    Answers many shortest-path queries with arbitrary endpoints on one
+    static grid. Setup computes distance fields from a few landmarks, chosen
+    far apart; a query then runs A* with the ALT heuristic: for any
+    landmark L, |d(L, goal) - d(L, cell)| never overestimates d(cell, goal),
+    and is much tighter than heuristic() around walls.
+
+    Goals asked for repeatedly get a full distance field of their own (kept
+    for the cache_size most recently used goals), after which a query to
+    them is a walk downhill on the field with no search at all. Queries
+    are counted for the 8 * cache_size most recently asked goals only, so
+    a long-running router does not keep a count for every goal it has
+    ever seen. route_many
+    answers a batch together, computing one field per goal shared by
+    several queries.
+    """
+
+    def __init__(self, grid, landmarks=8, cache_size=16, field_after=2):
+        self.grid = grid if isinstance(grid, Grid) else Grid(grid)
+        self.cache_size = cache_size
+        self.field_after = field_after  # Queries to one goal before it gets a field
+        self.fields = OrderedDict()  # goal id -> distance field, least recently used first
+        self.goal_counts = OrderedDict()  # goal id -> queries so far, least recently asked first
+        self.landmarks, self.landmark_tables = [], []
+        free = np.flatnonzero(~self.grid.blocked.ravel())
+        if free.size:
+            self._place_landmarks(free, landmarks)
+
+    def _place_landmarks(self, free, count):
+        # Farthest-point placement: each landmark is the cell furthest
+        # (fewest moves) from all landmarks so far, within the region of
+        # the first one; queries elsewhere fall back to heuristic()
+        unreached = np.iinfo(np.int64).max
+        nearest = np.full(self.grid.size, unreached, dtype=np.int64)
+        node = int(np.argmax(distance_field(self.grid, self.grid.cell(int(free[0])))))
+        for _ in range(count):
+            table = distance_field(self.grid, self.grid.cell(node))
+            self.landmarks.append(node)
+            self.landmark_tables.append(array('i', table.tobytes()))
+            reached = table >= 0
+            nearest[reached] = np.minimum(nearest[reached], table[reached])
+            candidates = np.where(nearest[free] == unreached, 0, nearest[free])
+            if candidates.max() <= 0:
+                break
+            node = int(free[np.argmax(candidates)])
+
+    def field(self, goal):
+        # Distance field of goal (a cell id), from the cache if it is there
+        if goal in self.fields:
+            self.fields.move_to_end(goal)
+            return self.fields[goal]
+        field = distance_field(self.grid, self.grid.cell(goal))
+        self.fields[goal] = field
+        if len(self.fields) > self.cache_size:
+            self.fields.popitem(last=False)
+        return field
+
+    def _walk(self, field, start):
+        # Follow the field downhill from start, taking the first move in MOVES
+        # order at each step
+        if field[start] < 0:
+            return -1, []
+        masks, offsets = self.grid.neighbour_masks, self.grid.offsets
+        node, nodes = start, [start]
+        for distance in range(int(field[start]) - 1, -1, -1):
+            mask = masks[node]
+            node = next(node + offset for k, offset in enumerate(offsets)
+                        if mask >> k & 1 and field[node + offset] == distance)
+            nodes.append(node)
+        return len(nodes), [self.grid.cell(node) for node in nodes]
+
+    def _search(self, start, goal):
+        # A* with the larger of heuristic() and the landmark bound
+        width, masks, offsets = self.grid.width, self.grid.neighbour_masks, self.grid.offsets
+        goal_x, goal_y = divmod(goal, width)
+        bounds = []
+        for table in self.landmark_tables:
+            if (table[start] < 0) != (table[goal] < 0):
+                return -1, []  # One end is in the landmark's region, the other is not
+            if table[goal] >= 0:
+                bounds.append((table, table[goal]))
+
+        def estimate(node):
+            x, y = divmod(node, width)
+            h = max(abs(x - goal_x), abs(y - goal_y))
+            for table, to_goal in bounds:
+                h = max(h, abs(to_goal - table[node]))
+            return h
+
+        g = {start: 0}
+        parent = {start: -1}
+        closed = set()
+        OPEN = [(estimate(start), 0, start)]
+        while OPEN:
+            _, g_curr, node = heapq.heappop(OPEN)
+            if node == goal:
+                path = self.grid.path(parent, node)
+                return len(path), path
+            if node in closed:
+                continue
+            closed.add(node)
+            g_next = 1 - g_curr
+            mask = masks[node]
+            for k, offset in enumerate(offsets):
+                if mask >> k & 1:
+                    neighbour = node + offset
+                    if g_next < g.get(neighbour, UNREACHED):
+                        g[neighbour] = g_next
+                        parent[neighbour] = node
+                        heapq.heappush(OPEN, (g_next + estimate(neighbour), -g_next, neighbour))
+        return -1, []
+
+    def route(self, start, goal):
+        """Shortest path from start to goal as (length, path), like a_star."""
+        start, goal = tuple(start), tuple(goal)
+        if not self.grid.is_free(start) or not self.grid.is_free(goal):
+            return -1, []
+        start, goal = self.grid.node(start), self.grid.node(goal)
+        if goal in self.fields or self._count(goal) >= self.field_after:
+            return self._walk(self.field(goal), start)
+        return self._search(start, goal)
+
+    def _count(self, goal, queries=1):
+        # Add queries to goal's count and return it, forgetting the goals
+        # asked for least recently once more than 8 * cache_size are counted
+        count = self.goal_counts.pop(goal, 0) + queries
+        self.goal_counts[goal] = count
+        if len(self.goal_counts) > 8 * self.cache_size:
+            self.goal_counts.popitem(last=False)
+        return count
+
+    def route_many(self, queries):
+        """
+        Answer a list of (start, goal) pairs; returns their (length, path)
+        results in the same order. Queries are grouped by goal, and a goal
+        shared by several of them is answered from one distance field.
+        """
+        by_goal = defaultdict(list)
+        for index, (_, goal) in enumerate(queries):
+            by_goal[tuple(goal)].append(index)
+        results = [None] * len(queries)
+        for goal, indices in by_goal.items():
+            if len(indices) > 1 and self.grid.is_free(goal):
+                self._count(self.grid.node(goal), len(indices) - 1)
+            for index in indices:
+                results[index] = self.route(queries[index][0], goal)
+        return results
+
+
+# --- Hierarchical search over a grid file ---
+
+GRID_FILE_HEADER = struct.Struct("<4sB3xqq")  # magic, bits per cell, height, width
+GRID_FILE_MAGIC = b"GRID"
+
+
+def write_grid_file(path, grid, bits=8, rows_per_chunk=1024):
+    """
+    Save grid (0 = free) for GridFile: a header, then the rows, with one
+    byte per cell (bits=8) or one bit per cell (bits=1, each row padded to
+    whole bytes, first cell in the lowest bit). grid may itself be a
+    np.memmap; it is written a chunk of rows at a time.
+    """
+    if bits not in (1, 8):
+        raise ValueError("bits must be 1 or 8")
+    grid = grid if isinstance(grid, np.ndarray) else np.asarray(grid)
+    height, width = grid.shape
+    with open(path, "wb") as handle:
+        handle.write(GRID_FILE_HEADER.pack(GRID_FILE_MAGIC, bits, height, width))
+        for top in range(0, height, rows_per_chunk):
+            rows = np.asarray(grid[top:top + rows_per_chunk]) != 0
+            if bits == 1:
+                rows = np.packbits(rows, axis=1, bitorder="little")
+            handle.write(rows.astype(np.uint8).tobytes())
+
+
+class GridFile:
+    """
+    A grid file written by write_grid_file, memory-mapped: only the parts
+    that region() reads are ever loaded.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as handle:
+            magic, self.bits, self.height, self.width = GRID_FILE_HEADER.unpack(
+                handle.read(GRID_FILE_HEADER.size))
+        if magic != GRID_FILE_MAGIC or self.bits not in (1, 8):
+            raise ValueError(f"{path} is not a grid file")
+        row_bytes = self.width if self.bits == 8 else (self.width + 7) // 8
+        self.data = np.memmap(path, dtype=np.uint8, mode="r", offset=GRID_FILE_HEADER.size,
+                              shape=(self.height, row_bytes))
+
+    def region(self, top, bottom, left, right):
+        # Rows top..bottom-1, columns left..right-1, as 0/1 (1 = blocked)
+        if self.bits == 8:
+            return (self.data[top:bottom, left:right] != 0).astype(np.uint8)
+        packed = self.data[top:bottom, left // 8:(right + 7) // 8]
+        cells = np.unpackbits(packed, axis=1, bitorder="little")
+        return cells[:, left % 8:left % 8 + right - left]
+
+    def is_free(self, cell):
+        x, y = cell
+        return 0 <= x < self.height and 0 <= y < self.width and not self.region(x, x + 1, y, y + 1)[0, 0]
+
+
+def _runs(flags):
+    # (first, last) index of every run of True in a 1-D boolean array
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], flags.astype(np.int8), [0]))))
+    return list(zip(edges[::2], edges[1::2] - 1))
+
+
+def _entrance_distances(blocked, cells):
+    """
+    Moves between every two of cells inside the tile blocked (0 = free), as
+    a square int64 array with -1 where one can't reach the other. One
+    breadth-first search from all cells at once: each cell of the tile
+    holds a bit per source, in 64-bit words, and a step spreads the bits of
+    the frontier to the 8 neighbours with array shifts.
+    """
+    count = len(cells)
+    words = -(-count // 64)
+    height, width = blocked.shape
+    free = np.pad(blocked == 0, 1)
+    seen = np.zeros((words, height + 2, width + 2), dtype=np.uint64)
+    for i, (x, y) in enumerate(cells):
+        seen[i // 64, x + 1, y + 1] |= np.uint64(1 << i % 64)
+    frontier = seen.copy()
+    rows, columns = np.array([x + 1 for x, _ in cells]), np.array([y + 1 for _, y in cells])
+    bits = np.uint64(1) << np.arange(64, dtype=np.uint64)
+    distances = np.where(np.eye(count, dtype=bool), 0, -1)
+    steps = 0
+    while frontier.any():
+        steps += 1
+        spread = np.zeros_like(frontier)
+        inner = frontier[:, 1:-1, 1:-1]
+        for dx, dy in MOVES:
+            spread[:, 1 + dx:height + 1 + dx, 1 + dy:width + 1 + dy] |= inner
+        frontier = spread & ~seen & np.where(free, ~np.uint64(0), np.uint64(0))
+        seen |= frontier
+        # reached[j, i]: source i reached cells[j] in this step
+        reached = (frontier[:, rows, columns].T[:, :, None] & bits) != 0
+        reached = reached.reshape(count, words * 64)[:, :count]
+        distances[reached.T] = steps
+    return distances
+
+
+class HierarchicalGrid:
+    """
+    HPA* (Botea, Mueller and Schaeffer) over a GridFile. The grid is cut
+    into square clusters; build() finds the entrances between neighbouring
+    clusters, one or two cell pairs per open stretch of border, and the
+    distance between every two entrances of a cluster, which together make
+    the abstract graph. save() and load() keep it next to the grid file.
+
+    route() connects start and goal to the entrances of their clusters,
+    searches the abstract graph, and then runs A* on cells restricted to
+    the clusters that route passes through and the margin clusters around
+    them (the corridor). If a step the corridor refused has f below the
+    length found, a shorter path may leave the corridor, and route() runs
+    A* again without the restriction; fallbacks counts how often. The path
+    therefore always has a_star's length.
+    """
+
+    def __init__(self, grid_file, cluster_size=32, margin=1):
+        self.file = grid_file if isinstance(grid_file, GridFile) else GridFile(grid_file)
+        self.cluster_size = cluster_size
+        self.margin = margin  # Clusters around the abstract route that refinement searches
+        self.fallbacks = 0  # route() calls that had to search outside the corridor
+        self.rows = -(-self.file.height // cluster_size)
+        self.columns = -(-self.file.width // cluster_size)
+        self.cells = np.zeros(0, dtype=np.int64)  # Entrance cell ids, sorted by cluster
+        self.cluster_starts = np.zeros(self.rows * self.columns + 1, dtype=np.int64)
+        self.indptr = np.zeros(1, dtype=np.int64)  # Edges of entrance i: indptr[i]..indptr[i+1]-1
+        self.indices = np.zeros(0, dtype=np.int64)
+        self.costs = np.zeros(0, dtype=np.int64)
+
+    # Cells and clusters
+
+    def cluster_of(self, node):
+        x, y = divmod(node, self.file.width)
+        return x // self.cluster_size * self.columns + y // self.cluster_size
+
+    def bounds(self, cluster):
+        # (top, bottom, left, right) of a cluster, bottom and right exclusive
+        row, column = divmod(cluster, self.columns)
+        top, left = row * self.cluster_size, column * self.cluster_size
+        return (top, min(top + self.cluster_size, self.file.height),
+                left, min(left + self.cluster_size, self.file.width))
+
+    def tile(self, cluster):
+        return Grid(self.file.region(*self.bounds(cluster)))
+
+    def _local(self, cluster, node):
+        # Cell id of node inside its cluster's tile
+        top, _, left, right = self.bounds(cluster)
+        x, y = divmod(node, self.file.width)
+        return (x - top) * (right - left) + y - left
+
+    # Abstract graph
+
+    def _crossings(self, horizontal):
+        """
+        Cell pairs where a move crosses from one cluster into the next one
+        to the right (horizontal) or below: per run of border rows where
+        both sides are free, its middle, or both ends if it is long; plus
+        every diagonal-only crossing, which no such run covers. Only the
+        two border lines of one cluster pair are read at a time; diagonal
+        steps into the next pair are the corner crossings build() adds.
+        """
+        width, height, size = self.file.width, self.file.height, self.cluster_size
+        pairs = []
+        limit, other = (width, height) if horizontal else (height, width)
+        for line in range(size, limit, size):
+
+            def node(offset, index, line=line):
+                return index * width + line - 1 + offset if horizontal else (line - 1 + offset) * width + index
+
+            for block in range(0, other, size):
+                end = min(block + size, other)
+                if horizontal:
+                    border = self.file.region(block, end, line - 1, line + 1).T == 0
+                else:
+                    border = self.file.region(line - 1, line + 1, block, end) == 0
+                near, far = border
+                # Straight crossings, in runs that do not leave one cluster pair
+                for first, last in _runs(near & far):
+                    picks = {first, last} if last - first >= 5 else {(first + last) // 2}
+                    pairs += [(node(0, block + i), node(1, block + i)) for i in picks]
+                alone = ~(near & far)  # No straight crossing here
+                for step in (1, -1):
+                    a = np.arange(max(0, -step), len(near) - max(0, step))
+                    diagonal = a[near[a] & far[a + step] & alone[a] & alone[a + step]]
+                    pairs += [(node(0, block + i), node(1, block + i + step)) for i in diagonal.tolist()]
+        return pairs
+
+    def build(self):
+        """Find the entrances and compute the abstract graph."""
+        width = self.file.width
+        pairs = self._crossings(True) + self._crossings(False)
+        for row in range(1, self.rows):
+            for column in range(1, self.columns):
+                x, y = row * self.cluster_size, column * self.cluster_size
+                if self.file.is_free((x - 1, y - 1)) and self.file.is_free((x, y)):
+                    pairs.append(((x - 1) * width + y - 1, x * width + y))
+                if self.file.is_free((x - 1, y)) and self.file.is_free((x, y - 1)):
+                    pairs.append(((x - 1) * width + y, x * width + y - 1))
+
+        cells = sorted({cell for pair in pairs for cell in pair}, key=lambda cell: (self.cluster_of(cell), cell))
+        index = {cell: i for i, cell in enumerate(cells)}
+        edges = [dict() for _ in cells]
+        for a, b in pairs:
+            edges[index[a]][index[b]] = edges[index[b]][index[a]] = 1
+
+        self.cells = np.array(cells, dtype=np.int64)
+        clusters = np.array([self.cluster_of(cell) for cell in cells], dtype=np.int64)
+        self.cluster_starts = np.searchsorted(clusters, np.arange(self.rows * self.columns + 1))
+        for cluster in range(self.rows * self.columns):
+            first, last = self.cluster_starts[cluster], self.cluster_starts[cluster + 1]
+            if last - first < 2:
+                continue
+            top, _, left, _ = self.bounds(cluster)
+            local = [divmod(cell, width) for cell in cells[first:last]]
+            local = [(x - top, y - left) for x, y in local]
+            distances = _entrance_distances(self.file.region(*self.bounds(cluster)), local)
+            for i, j in zip(*np.nonzero(distances > 0)):
+                cost = int(distances[i, j])
+                if cost < edges[first + i].get(first + j, UNREACHED):
+                    edges[first + i][first + j] = cost
+
+        self.indptr = np.cumsum([0] + [len(edge) for edge in edges]).astype(np.int64)
+        self.indices = np.array([j for edge in edges for j in edge], dtype=np.int64)
+        self.costs = np.array([cost for edge in edges for cost in edge.values()], dtype=np.int64)
+        return self
+
+    def save(self, path):
+        np.savez(path, shape=np.array([self.file.height, self.file.width, self.cluster_size]),
+                 cells=self.cells, cluster_starts=self.cluster_starts,
+                 indptr=self.indptr, indices=self.indices, costs=self.costs)
+
+    @classmethod
+    def load(cls, path, grid_file):
+        saved = np.load(path)
+        height, width, cluster_size = (int(value) for value in saved["shape"])
+        graph = cls(grid_file, cluster_size)
+        if (graph.file.height, graph.file.width) != (height, width):
+            raise ValueError("abstract graph was built for a different grid")
+        for name in ("cells", "cluster_starts", "indptr", "indices", "costs"):
+            setattr(graph, name, saved[name])
+        return graph
+
+    # Queries
+
+    def _links(self, node, tiles):
+        # Distances from node to the entrances of its cluster, {entrance: cost}
+        cluster = self.cluster_of(node)
+        if cluster not in tiles:
+            tiles[cluster] = self.tile(cluster)
+        field = distance_field(tiles[cluster], tiles[cluster].cell(self._local(cluster, node)))
+        first, last = self.cluster_starts[cluster], self.cluster_starts[cluster + 1]
+        links = {}
+        for i in range(first, last):
+            cost = int(field[self._local(cluster, int(self.cells[i]))])
+            if cost >= 0:
+                links[int(i)] = cost
+        return links, field
+
+    def _abstract_route(self, start, goal, tiles):
+        # A* on the abstract graph with start and goal added as nodes -1 and
+        # -2; returns the list of cell ids on the route, or None
+        width = self.file.width
+        goal_x, goal_y = divmod(goal, width)
+        start_links, start_field = self._links(start, tiles)
+        goal_links, _ = self._links(goal, tiles)
+
+        def cell(i):
+            return start if i == -1 else goal if i == -2 else int(self.cells[i])
+
+        def estimate(i):
+            x, y = divmod(cell(i), width)
+            return max(abs(x - goal_x), abs(y - goal_y))
+
+        g, parent, closed = {-1: 0}, {-1: None}, set()
+        OPEN = [(estimate(-1), 0, -1)]
+        while OPEN:
+            _, g_curr, i = heapq.heappop(OPEN)
+            if i == -2:
+                route = []
+                while i is not None:
+                    route.append(cell(i))
+                    i = parent[i]
+                return route[::-1]
+            if i in closed:
+                continue
+            closed.add(i)
+            if i == -1:
+                neighbours = list(start_links.items())
+                if self.cluster_of(start) == self.cluster_of(goal):
+                    direct = int(start_field[self._local(self.cluster_of(goal), goal)])
+                    if direct >= 0:
+                        neighbours.append((-2, direct))
+            else:
+                neighbours = list(zip(self.indices[self.indptr[i]:self.indptr[i + 1]].tolist(),
+                                      self.costs[self.indptr[i]:self.indptr[i + 1]].tolist()))
+                if i in goal_links:
+                    neighbours.append((-2, goal_links[i]))
+            g_curr = -g_curr
+            for j, cost in neighbours:
+                if g_curr + cost < g.get(j, UNREACHED):
+                    g[j] = g_curr + cost
+                    parent[j] = i
+                    heapq.heappush(OPEN, (g[j] + estimate(j), -g[j], j))
+        return None
+
+    def _refine(self, start, goal, clusters, tiles):
+        """
+        A* on cells inside clusters (None: anywhere on the grid). Returns
+        the path, or None, and the least f of the steps it refused because
+        they left clusters (UNREACHED if none): only a path through one of
+        those can be shorter than the one found.
+        """
+        width, height = self.file.width, self.file.height
+        size = self.cluster_size
+        blocked = {}
+
+        def tile_at(nx, ny):
+            cluster = nx // size * self.columns + ny // size
+            if cluster not in blocked:
+                if clusters is not None and cluster not in clusters:
+                    return None
+                top, _, left, _ = self.bounds(cluster)
+                if cluster not in tiles:
+                    tiles[cluster] = self.tile(cluster)
+                blocked[cluster] = (tiles[cluster].blocked, top, left)
+            return blocked[cluster]
+
+        goal_x, goal_y = divmod(goal, width)
+        g, parent = {start: 0}, {start: -1}
+        OPEN = [(0, 0, start)]
+        bound = UNREACHED
+        while OPEN:
+            _, g_curr, node = heapq.heappop(OPEN)
+            g_curr = -g_curr
+            if g_curr > g[node]:
+                continue  # A shorter way to node was found after this push
+            if node == goal:
+                break
+            x, y = divmod(node, width)
+            g_next = g_curr + 1
+            for dx, dy in MOVES:
+                nx, ny = x + dx, y + dy
+                if not (0 <= nx < height and 0 <= ny < width):
+                    continue
+                neighbour = nx * width + ny
+                if g_next >= g.get(neighbour, UNREACHED):
+                    continue
+                f = g_next + max(abs(nx - goal_x), abs(ny - goal_y))
+                tile = tile_at(nx, ny)
+                if tile is None:
+                    bound = min(bound, f)
+                elif not tile[0][nx - tile[1], ny - tile[2]]:
+                    g[neighbour] = g_next
+                    parent[neighbour] = node
+                    heapq.heappush(OPEN, (f, -g_next, neighbour))
+
+        if goal not in g:
+            return None, bound
+        nodes = [goal]
+        while parent[nodes[-1]] != -1:
+            nodes.append(parent[nodes[-1]])
+        return [divmod(node, width) for node in reversed(nodes)], bound
+
+    def route(self, start=None, goal=None):
+        """
+        Path from start to goal (default: top-left to bottom-right corner)
+        as (length, path), like a_star. build() or load() must come first.
+        """
+        start = (0, 0) if start is None else tuple(start)
+        goal = (self.file.height - 1, self.file.width - 1) if goal is None else tuple(goal)
+        if not self.file.is_free(start) or not self.file.is_free(goal):
+            return -1, []
+        width = self.file.width
+        start, goal = start[0] * width + start[1], goal[0] * width + goal[1]
+        tiles = {}
+        route = self._abstract_route(start, goal, tiles)
+        if route is None:
+            return -1, []
+        clusters = set()
+        for node in route:
+            row, column = divmod(self.cluster_of(node), self.columns)
+            for r in range(max(0, row - self.margin), min(self.rows, row + self.margin + 1)):
+                for c in range(max(0, column - self.margin), min(self.columns, column + self.margin + 1)):
+                    clusters.add(r * self.columns + c)
+        path, bound = self._refine(start, goal, clusters, tiles)
+        if bound < (UNREACHED if path is None else len(path) - 1):
+            # A step out of the corridor could still lead to a shorter path.
+            # Search again with no cluster limit: that is plain A* and reads
+            # every tile with a cell whose f is below the corridor's length,
+            # which on a maze-like grid can be most of the file
+            self.fallbacks += 1
+            path, _ = self._refine(start, goal, None, tiles)
+        return (-1, []) if path is None else (len(path), path)
+
+
+# --- Replanning when cells change ---
+
+class DStarLite:
+    """
+    D* Lite (Koenig and Likhachev) on a grid whose cells can change between
+    plans. It searches backwards from the goal and keeps, for every cell,
+    g (its settled distance to the goal) and rhs (the one-step lookahead
+    min(1 + g of a neighbour)); a cell is consistent when the two agree.
+    After update_cells() only the cells whose values the changes invalidate
+    go back on the queue, so a replan repairs the old search rather than
+    starting over. move_to() moves the start along, as a robot following
+    the path would. Moves are MOVES with cost 1 and heuristic() guides the
+    search, so plan() returns paths as short as a_star's.
+
+        planner = DStarLite(grid)
+        length, path = planner.plan()
+        planner.update_cells([((3, 4), 1), ((7, 2), 0)])
+        length, path = planner.plan()
+    """
+
+    def __init__(self, grid, start=None, goal=None):
+        grid = Grid(grid)  # A copy: the planner's cells change independently of the caller's grid
+        self.grid = grid
+        self.height, self.width = grid.height, grid.width
+        self.start, self.goal = _endpoints(grid, start, goal)
+        self.goal_node = grid.node(self.goal)
+        # Neighbour masks change with the cells; on_grid is the mask every
+        # cell would have if nothing were blocked
+        self.masks = bytearray(grid.neighbour_masks)
+        self.on_grid = Grid(np.zeros(grid.blocked.shape, dtype=np.uint8)).neighbour_masks
+        self.km = 0  # Heuristic drift since the start first moved
+        self.g = array('d', [INF]) * grid.size
+        self.rhs = array('d', [INF]) * grid.size
+        self.OPEN, self.keys = [], {}  # Heap with stale entries, and each queued cell's current key
+        self.expanded = 0  # Cells expanded by the searches so far
+        if grid.is_free(self.goal):
+            self.rhs[self.goal_node] = 0
+            self._push(self.goal_node)
+
+    def _key(self, node):
+        best = min(self.g[node], self.rhs[node])
+        x, y = divmod(node, self.width)
+        return best + max(abs(x - self.start[0]), abs(y - self.start[1])) + self.km, best
+
+    def _push(self, node):
+        key = self._key(node)
+        self.keys[node] = key
+        heapq.heappush(self.OPEN, (key, node))
+
+    def _neighbours(self, node):
+        mask, offsets = self.masks[node], self.grid.offsets
+        return [node + offsets[k] for k in range(len(MOVES)) if mask >> k & 1]
+
+    def _update(self, node):
+        g, rhs = self.g, self.rhs
+        if node != self.goal_node:
+            rhs[node] = min([g[n] for n in self._neighbours(node)], default=INF) + 1
+        else:
+            rhs[node] = 0  # The goal may just have been freed again
+        if g[node] != rhs[node]:
+            self._push(node)
+        elif node in self.keys:
+            del self.keys[node]
+
+    def _compute(self):
+        g, rhs, keys, OPEN = self.g, self.rhs, self.keys, self.OPEN
+        start = self.grid.node(self.start)
+        while OPEN:
+            key, node = OPEN[0]
+            if keys.get(node) != key:
+                heapq.heappop(OPEN)  # Stale entry
+                continue
+            if key >= self._key(start) and rhs[start] == g[start]:
+                return
+            new_key = self._key(node)
+            if key < new_key:
+                self._push(node)
+                continue
+            heapq.heappop(OPEN)
+            del keys[node]
+            self.expanded += 1
+            if g[node] > rhs[node]:
+                g[node] = rhs[node]
+                # Neighbours can only get better through node: no need to
+                # look at all their neighbours again
+                through = g[node] + 1
+                for n in self._neighbours(node):
+                    if through < rhs[n]:
+                        rhs[n] = through
+                        if g[n] != through:
+                            self._push(n)
+                        elif n in keys:
+                            del keys[n]
+            else:
+                g[node] = INF
+                for n in self._neighbours(node):
+                    self._update(n)
+                self._update(node)
+
+    def plan(self):
+        """Shortest path from the current start to the goal as (length, path), like a_star."""
+        if not self.grid.is_free(self.start) or not self.grid.is_free(self.goal):
+            return -1, []
+        self._compute()
+        node, goal = self.grid.node(self.start), self.goal_node
+        if self.g[node] == INF:
+            return -1, []
+        nodes = [node]
+        while node != goal:
+            # Step to the neighbour nearest the goal, the first in MOVES on ties
+            node = min(self._neighbours(node), key=self.g.__getitem__)
+            nodes.append(node)
+        return len(nodes), [self.grid.cell(node) for node in nodes]
+
+    def move_to(self, cell):
+        """Move the start to cell (normally the next cell of the path)."""
+        cell = tuple(cell)
+        self.km += heuristic(self.start, cell)
+        self.start = cell
+
+    def update_cells(self, changes):
+        """
+        Apply changes, an iterable of (cell, blocked) pairs (blocked: 0 =
+        free, anything else = blocked); the next plan() repairs the search.
+        """
+        grid, masks, offsets = self.grid, self.masks, self.grid.offsets
+        touched = set()
+        for cell, blocked in changes:
+            cell = tuple(cell)
+            if not (0 <= cell[0] < self.height and 0 <= cell[1] < self.width):
+                raise ValueError(f"cell {cell} is outside the grid")
+            blocked = bool(blocked)
+            if grid.blocked[cell] == blocked:
+                continue
+            grid.blocked[cell] = blocked
+            node = grid.node(cell)
+            mask = 0
+            for k in range(len(MOVES)):
+                if self.on_grid[node] >> k & 1:
+                    neighbour = node + offsets[k]
+                    back = len(MOVES) - 1 - k  # MOVES is symmetric: the reverse of move k
+                    if blocked:
+                        masks[neighbour] &= ~(1 << back)
+                    elif not grid.blocked[divmod(neighbour, self.width)]:
+                        masks[neighbour] |= 1 << back
+                        mask |= 1 << k
+                    touched.add(neighbour)
+            masks[node] = mask
+            touched.add(node)
+        for node in touched:
+            if grid.blocked[divmod(node, self.width)]:
+                self.g[node] = self.rhs[node] = INF
+                self.keys.pop(node, None)
+            else:
+                self._update(node)
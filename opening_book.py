@@ -0,0 +1,183 @@
+"""
+Opening book for the Assignment 3 chess AI.
+
+The book is a binary file in the Polyglot layout: 16-byte big-endian
+entries (key, move, weight, learn) sorted by key, where key is the
+position's Polyglot Zobrist hash -- the same key SearchBoard.zobrist_key()
+keeps up to date. OpeningBook memory-maps the file and binary-searches it,
+so a lookup only touches a few pages and the file is never read into
+memory as a whole.
+
+Build a book from a collection of games:
+    python opening_book.py games.pgn book.bin --plies 16
+
+The input is either a PGN file (*.pgn) or a text file with one game per
+line, written as space-separated UCI moves (e2e4 e7e5 g1f3 ...).
+"""
+
+import argparse
+import mmap
+import random
+import struct
+
+import chess
+import chess.polyglot
+
+ENTRY = struct.Struct(">QHHI")  # key, move, weight, learn
+MAX_WEIGHT = 0xFFFF
+
+
+def position_key(board):
+    # SearchBoard has the key at hand; any other board is hashed from scratch
+    if hasattr(board, "zobrist_key"):
+        return board.zobrist_key()
+    return chess.polyglot.zobrist_hash(board)
+
+
+def encode_move(board, move):
+    # Polyglot writes castling as the king capturing its own rook (e1h1)
+    to_square = move.to_square
+    if board.is_castling(move):
+        rank = chess.square_rank(move.from_square)
+        to_square = chess.square(7 if board.is_kingside_castling(move) else 0, rank)
+    promotion = move.promotion - 1 if move.promotion else 0
+    return to_square | (move.from_square << 6) | (promotion << 12)
+
+
+def decode_move(board, raw):
+    from_square = (raw >> 6) & 0x3F
+    to_square = raw & 0x3F
+    promotion = (raw >> 12) & 0x7
+    if board.kings & chess.BB_SQUARES[from_square] and board.rooks & board.occupied_co[board.turn] & chess.BB_SQUARES[to_square]:
+        # King onto its own rook: castling, in standard notation e1g1 / e1c1
+        rank = chess.square_rank(from_square)
+        to_square = chess.square(6 if to_square > from_square else 2, rank)
+    return chess.Move(from_square, to_square, promotion + 1 if promotion else None)
+
+
+class OpeningBook:
+    """Read-only, memory-mapped view of a sorted binary opening book."""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file, which mmap refuses
+            self._map = b""
+        self.size = len(self._map) // ENTRY.size
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.size
+
+    def _first_index(self, key):
+        # Lowest entry index whose key is >= key
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if ENTRY.unpack_from(self._map, mid * ENTRY.size)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def entries(self, key):
+        """(raw_move, weight) pairs stored for a position key."""
+        found = []
+        index = self._first_index(key)
+        while index < self.size:
+            entry_key, raw_move, weight, _ = ENTRY.unpack_from(self._map, index * ENTRY.size)
+            if entry_key != key:
+                break
+            found.append((raw_move, weight))
+            index += 1
+        return found
+
+    def moves(self, board):
+        """Legal book moves for board as (move, weight) pairs."""
+        result = []
+        for raw_move, weight in self.entries(position_key(board)):
+            move = decode_move(board, raw_move)
+            if weight > 0 and board.is_legal(move):
+                result.append((move, weight))
+        return result
+
+    def choose(self, board, rng=random):
+        """Pick a book move for board at random, weighted; None if out of book."""
+        candidates = self.moves(board)
+        if not candidates:
+            return None
+        moves, weights = zip(*candidates)
+        return rng.choices(moves, weights=weights)[0]
+
+
+def read_games(path):
+    """Yield each game in a PGN or UCI move-list file as a list of moves."""
+    if path.lower().endswith(".pgn"):
+        from chess import pgn  # Only the builder needs the PGN parser
+
+        with open(path, encoding="utf-8", errors="replace") as handle:
+            while True:
+                game = pgn.read_game(handle)
+                if game is None:
+                    break
+                yield list(game.mainline_moves())
+    else:
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                if line.strip() and not line.lstrip().startswith("#"):
+                    yield [chess.Move.from_uci(token) for token in line.split()]
+
+
+def build_book(games, path, max_plies=16, min_count=1):
+    """
+    Write a book from an iterable of games (lists of moves) to path.
+
+    Every move played in the first max_plies plies of a game counts once
+    towards that move's weight in its position. Moves seen fewer than
+    min_count times are left out. Returns the number of entries written.
+    """
+    counts = {}
+    for moves in games:
+        board = chess.Board()
+        for move in moves[:max_plies]:
+            if not board.is_legal(move):
+                break
+            entry = (chess.polyglot.zobrist_hash(board), encode_move(board, move))
+            counts[entry] = counts.get(entry, 0) + 1
+            board.push(move)
+
+    entries = sorted((key, raw_move, count) for (key, raw_move), count in counts.items() if count >= min_count)
+    top = max((count for _, _, count in entries), default=1)
+    with open(path, "wb") as handle:
+        for key, raw_move, count in entries:
+            # Scale down so the most played move still fits in 16 bits
+            weight = max(1, count * MAX_WEIGHT // top) if top > MAX_WEIGHT else count
+            handle.write(ENTRY.pack(key, raw_move, weight, 0))
+    return len(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a binary opening book from PGN or UCI move lists.")
+    parser.add_argument("games", help="PGN file (*.pgn) or text file with one UCI move list per line")
+    parser.add_argument("book", help="output book file")
+    parser.add_argument("--plies", type=int, default=16, help="plies of each game to include (default 16)")
+    parser.add_argument("--min-count", type=int, default=1, help="drop moves played fewer times than this")
+    args = parser.parse_args()
+
+    written = build_book(read_games(args.games), args.book, args.plies, args.min_count)
+    print(f"Wrote {written} entries to {args.book}")
+
+
+if __name__ == "__main__":
+    main()
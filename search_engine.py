@@ -0,0 +1,656 @@
+"""
+Shared state-space search engine for the puzzle solvers.
+
+A puzzle describes itself as a Problem (start state, goal test, successors
+with step costs, heuristic, compact state key) and any of these searches
+can run on it:
+
+  bfs, dfs, iddfs             uninformed; bfs and dfs take the goal test
+                              when a state is popped, like solve_with_bfs
+  ucs, astar, greedy          priority-queue searches on cost, cost +
+                              heuristic, and heuristic alone
+  ida_star                    iterative deepening on cost + heuristic
+  branch_and_bound            depth-first search for the cheapest goal
+
+Every searched state is stored once, as an entry in flat node arrays with
+a parent index, and paths are rebuilt from those at the end instead of
+being copied onto every queue entry. Which states were already seen is kept
+by a visited backend: "dict" (any hashable key), "array" (int keys below
+problem.key_space, an int per key) or "bitset" (the same, a bit per key;
+for bfs and dfs, which only need to know whether a key was seen). Searches
+stop early once max_nodes states have been expanded or their storage
+would exceed max_memory bytes: the visited backend's own table plus, per
+stored state, problem.state_bytes() of the start state and NODE_OVERHEAD.
+
+The adapters at the end run the existing puzzles on the engine with the
+results of their hand-written solvers:
+
+    from search_engine import rabbit_leap_search, bridge_search, grid_search
+"""
+
+import heapq
+import sys
+from array import array
+from collections import deque
+from itertools import combinations
+
+import grid_pathfinding
+
+INF = float("inf")
+NODE_OVERHEAD = 120  # Bytes per stored node besides its state: arrays, visited entry, queue entry
+
+
+class Problem:
+    """
+    What a search needs to know about a puzzle. Subclasses override start,
+    is_goal and successors; heuristic defaults to 0 (uninformed) and key to
+    the state itself. Keys are what visited backends store and break ties
+    in priority queues, so they should be small, ordered values (ints are
+    best); set key_space to the number of possible int keys to allow the
+    "array" and "bitset" backends. state_bytes sizes a state for max_memory.
+    """
+
+    key_space = None
+
+    def start(self):
+        raise NotImplementedError
+
+    def is_goal(self, state):
+        raise NotImplementedError
+
+    def successors(self, state):
+        # Iterable of (next_state, step_cost)
+        raise NotImplementedError
+
+    def heuristic(self, state):
+        return 0
+
+    def key(self, state):
+        return state
+
+    def state_bytes(self, state):
+        # Bytes one stored state takes, for max_memory: by default its deep
+        # size, counting the objects it holds as well as the state itself
+        return deep_size(state)
+
+
+def deep_size(obj, seen=None):
+    """getsizeof() of obj and of everything its containers hold, each object counted once."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (tuple, list, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    return size
+
+
+class SearchResult:
+    """
+    Outcome of a search. status is "found", "exhausted" (no goal can be
+    reached), "node_limit", "memory_limit" or "depth_limit"; path is the
+    list of states from the start to the goal, or None.
+    """
+
+    def __init__(self, status, path=None, cost=None, expanded=0, stored=0, nodes=None):
+        self.status = status
+        self.path = path
+        self.cost = cost
+        self.expanded = expanded  # States whose successors were generated
+        self.stored = stored  # States kept in the node arrays
+        self.nodes = nodes
+
+    @property
+    def found(self):
+        return self.status == "found"
+
+    def __repr__(self):
+        return (f"SearchResult(status={self.status!r}, cost={self.cost}, "
+                f"expanded={self.expanded}, stored={self.stored})")
+
+
+class Nodes:
+    """Searched states as parallel arrays: state, parent index, path cost."""
+
+    def __init__(self):
+        self.states = []
+        self.parents = array('l')
+        self.costs = []
+
+    def add(self, state, parent, cost):
+        self.states.append(state)
+        self.parents.append(parent)
+        self.costs.append(cost)
+        return len(self.states) - 1
+
+    def __len__(self):
+        return len(self.states)
+
+    def path(self, index):
+        states = []
+        while index != -1:
+            states.append(self.states[index])
+            index = self.parents[index]
+        states.reverse()
+        return states
+
+    def costs_by_state(self):
+        # {state: best path cost found}, as the hand-written solvers report it
+        return dict(zip(self.states, self.costs))
+
+
+# --- Visited backends: key -> node index (or just "seen") ---
+
+class DictVisited:
+    def __init__(self, problem):
+        self.index = {}
+
+    @staticmethod
+    def table_bytes(problem):
+        return 0  # Entries are part of NODE_OVERHEAD
+
+    def get(self, key):
+        return self.index.get(key, -1)
+
+    def set(self, key, node):
+        self.index[key] = node
+
+
+class ArrayVisited:
+    def __init__(self, problem):
+        if not problem.key_space:
+            raise ValueError("the array backend needs problem.key_space")
+        self.index = array('l', [-1]) * problem.key_space
+
+    @staticmethod
+    def table_bytes(problem):
+        return array('l').itemsize * (problem.key_space or 0)
+
+    def get(self, key):
+        return self.index[key]
+
+    def set(self, key, node):
+        self.index[key] = node
+
+
+class BitsetVisited:
+    # Only remembers that a key was seen: get() returns 0 for seen keys
+    membership_only = True
+
+    def __init__(self, problem):
+        if not problem.key_space:
+            raise ValueError("the bitset backend needs problem.key_space")
+        self.bits = bytearray((problem.key_space + 7) // 8)
+
+    @staticmethod
+    def table_bytes(problem):
+        return ((problem.key_space or 0) + 7) // 8
+
+    def get(self, key):
+        return 0 if self.bits[key >> 3] >> (key & 7) & 1 else -1
+
+    def set(self, key, node):
+        self.bits[key >> 3] |= 1 << (key & 7)
+
+
+VISITED_BACKENDS = {"dict": DictVisited, "array": ArrayVisited, "bitset": BitsetVisited}
+
+
+def _visited(problem, backend, needs_index=False):
+    visited = VISITED_BACKENDS[backend](problem)
+    if needs_index and getattr(visited, "membership_only", False):
+        raise ValueError(f"the {backend} backend only works with bfs and dfs")
+    return visited
+
+
+class _Budget:
+    # Node and memory limits; check() returns the status that stops the search, or None.
+    # With no room for the visited backend's table and the start state, fits is False
+    def __init__(self, problem, start, backend, max_nodes, max_memory):
+        self.max_nodes = max_nodes
+        self.max_stored = None
+        if max_memory is not None:
+            table = VISITED_BACKENDS[backend].table_bytes(problem)
+            self.max_stored = max(0, max_memory - table) // (problem.state_bytes(start) + NODE_OVERHEAD)
+        self.fits = self.max_stored is None or self.max_stored >= 1
+
+    def check(self, expanded, stored):
+        if self.max_nodes is not None and expanded >= self.max_nodes:
+            return "node_limit"
+        if self.max_stored is not None and stored >= self.max_stored:
+            return "memory_limit"
+        return None
+
+
+def _finish(status, nodes, expanded, index=None):
+    if status == "found":
+        return SearchResult(status, nodes.path(index), nodes.costs[index], expanded, len(nodes), nodes)
+    return SearchResult(status, expanded=expanded, stored=len(nodes), nodes=nodes)
+
+
+# --- Uninformed searches ---
+
+def _in_order(problem, frontier, pop, visited, max_nodes, max_memory):
+    # bfs and dfs: the same loop, popping from the front or the back
+    start = problem.start()
+    budget = _Budget(problem, start, visited, max_nodes, max_memory)
+    if not budget.fits:
+        return _finish("memory_limit", Nodes(), 0)
+    visited = _visited(problem, visited)
+    nodes = Nodes()
+    frontier.append(nodes.add(start, -1, 0))
+    visited.set(problem.key(start), 0)
+    expanded = 0
+    while frontier:
+        index = pop(frontier)
+        state = nodes.states[index]
+        if problem.is_goal(state):
+            return _finish("found", nodes, expanded, index)
+        status = budget.check(expanded, len(nodes))
+        if status:
+            return _finish(status, nodes, expanded)
+        expanded += 1
+        cost = nodes.costs[index]
+        for successor, step in problem.successors(state):
+            key = problem.key(successor)
+            if visited.get(key) == -1:
+                child = nodes.add(successor, index, cost + step)
+                visited.set(key, child)
+                frontier.append(child)
+    return _finish("exhausted", nodes, expanded)
+
+
+def bfs(problem, visited="dict", max_nodes=None, max_memory=None):
+    """Breadth-first search: the path with the fewest steps."""
+    return _in_order(problem, deque(), deque.popleft, visited, max_nodes, max_memory)
+
+
+def dfs(problem, visited="dict", max_nodes=None, max_memory=None):
+    """Depth-first search; the last successor generated is explored first."""
+    return _in_order(problem, [], list.pop, visited, max_nodes, max_memory)
+
+
+def iddfs(problem, visited=None, max_nodes=None, max_memory=None, max_depth=None):
+    """
+    Iterative deepening: depth-first searches limited to 1, 2, 3, ... steps,
+    so the path has the fewest steps like bfs, while memory holds only the
+    current path (visited and max_memory are accepted so that every search
+    takes the same options, and ignored). States already on the path are
+    not revisited.
+    """
+    start = problem.start()
+    if problem.is_goal(start):
+        return SearchResult("found", [start], 0, 0, 1)
+    expanded = 0
+    depth = 1
+    while max_depth is None or depth <= max_depth:
+        path, on_path, costs = [start], {problem.key(start)}, [0]
+        stack = [iter(problem.successors(start))]
+        expanded += 1
+        cut_off = False
+        while stack:
+            successor = next(stack[-1], None)
+            if successor is None:
+                stack.pop()
+                on_path.discard(problem.key(path.pop()))
+                costs.pop()
+                continue
+            state, step = successor
+            key = problem.key(state)
+            if key in on_path:
+                continue
+            if problem.is_goal(state):
+                return SearchResult("found", path + [state], costs[-1] + step, expanded, len(path) + 1)
+            if len(path) == depth:
+                cut_off = True
+                continue
+            if max_nodes is not None and expanded >= max_nodes:
+                return SearchResult("node_limit", expanded=expanded, stored=len(path))
+            expanded += 1
+            path.append(state)
+            on_path.add(key)
+            costs.append(costs[-1] + step)
+            stack.append(iter(problem.successors(state)))
+        if not cut_off:
+            return SearchResult("exhausted", expanded=expanded)
+        depth += 1
+    return SearchResult("depth_limit", expanded=expanded)
+
+
+# --- Searches on cost and heuristic ---
+
+def _priority_search(problem, priority, visited, max_nodes, max_memory, cost_limit, latest_parent=False):
+    """
+    One loop for ucs, astar and greedy: a heap of (priority, tie, key, node)
+    with one node per key, whose cost and parent are updated in place when
+    a cheaper path turns up (old heap entries for it are then skipped). A
+    closed state is reopened if that happens after it was expanded.
+    With latest_parent, the parent of an open state is instead whichever
+    expanded state generated it last, as in the notebook's greedy search.
+    """
+    start = problem.start()
+    budget = _Budget(problem, start, visited, max_nodes, max_memory)
+    if not budget.fits:
+        return _finish("memory_limit", Nodes(), 0)
+    visited = _visited(problem, visited, needs_index=True)
+    nodes = Nodes()
+    closed = bytearray()
+    key = problem.key(start)
+    visited.set(key, nodes.add(start, -1, 0))
+    closed.append(0)
+    OPEN = [(*priority(0, problem.heuristic(start)), key, 0)]
+    expanded = 0
+    while OPEN:
+        _, _, _, index = heapq.heappop(OPEN)
+        if closed[index]:
+            continue
+        state = nodes.states[index]
+        if problem.is_goal(state):
+            return _finish("found", nodes, expanded, index)
+        status = budget.check(expanded, len(nodes))
+        if status:
+            return _finish(status, nodes, expanded)
+        closed[index] = 1
+        expanded += 1
+        cost = nodes.costs[index]
+        for successor, step in problem.successors(state):
+            g = cost + step
+            if g > cost_limit:
+                continue
+            key = problem.key(successor)
+            child = visited.get(key)
+            if child == -1:
+                child = nodes.add(successor, index, g)
+                closed.append(0)
+                visited.set(key, child)
+            elif latest_parent:
+                if not closed[child]:
+                    nodes.parents[child] = index
+                    nodes.costs[child] = g
+                continue
+            elif g < nodes.costs[child]:
+                nodes.parents[child] = index
+                nodes.costs[child] = g
+                closed[child] = 0
+            else:
+                continue
+            heapq.heappush(OPEN, (*priority(g, problem.heuristic(successor)), key, child))
+    return _finish("exhausted", nodes, expanded)
+
+
+def ucs(problem, visited="dict", max_nodes=None, max_memory=None, cost_limit=INF):
+    """Uniform-cost search (Dijkstra): the cheapest path. Steps costing past cost_limit are dropped."""
+    return _priority_search(problem, lambda g, h: (g, 0), visited, max_nodes, max_memory, cost_limit)
+
+
+def astar(problem, visited="dict", max_nodes=None, max_memory=None, cost_limit=INF):
+    """
+    A*: the cheapest path, if problem.heuristic never overestimates. Among
+    equal f = g + h the state furthest along (largest g) comes first.
+    """
+    return _priority_search(problem, lambda g, h: (g + h, -g), visited, max_nodes, max_memory, cost_limit)
+
+
+def greedy(problem, visited="dict", max_nodes=None, max_memory=None):
+    """Greedy best-first search on the heuristic alone: fast, not necessarily cheapest."""
+    return _priority_search(problem, lambda g, h: (h, 0), visited, max_nodes, max_memory, INF,
+                            latest_parent=True)
+
+
+def ida_star(problem, visited=None, max_nodes=None, max_memory=None, cost_limit=INF):
+    """
+    IDA*: depth-first searches bounded by f = g + h, the bound raised each
+    round to the smallest f that exceeded it. Memory is just the current
+    path (visited and max_memory are ignored, as for iddfs); the path is
+    the cheapest one if the heuristic never overestimates.
+    """
+    start = problem.start()
+    bound = problem.heuristic(start)
+    expanded = 0
+    while True:
+        path, on_path, costs = [start], {problem.key(start)}, [0]
+        stack = [iter(problem.successors(start))]
+        if problem.is_goal(start):
+            return SearchResult("found", path, 0, expanded, 1)
+        expanded += 1
+        next_bound = INF
+        while stack:
+            successor = next(stack[-1], None)
+            if successor is None:
+                stack.pop()
+                on_path.discard(problem.key(path.pop()))
+                costs.pop()
+                continue
+            state, step = successor
+            key = problem.key(state)
+            if key in on_path:
+                continue
+            g = costs[-1] + step
+            if g > cost_limit:
+                continue
+            f = g + problem.heuristic(state)
+            if f > bound:
+                next_bound = min(next_bound, f)
+                continue
+            if problem.is_goal(state):
+                return SearchResult("found", path + [state], g, expanded, len(path) + 1)
+            if max_nodes is not None and expanded >= max_nodes:
+                return SearchResult("node_limit", expanded=expanded, stored=len(path))
+            expanded += 1
+            path.append(state)
+            on_path.add(key)
+            costs.append(g)
+            stack.append(iter(problem.successors(state)))
+        if next_bound == INF:
+            return SearchResult("exhausted", expanded=expanded)
+        bound = next_bound
+
+
+def branch_and_bound(problem, visited="dict", max_nodes=None, max_memory=None, cost_limit=INF):
+    """
+    Depth-first branch and bound: explores cheapest successors first, keeps
+    the best goal found so far and drops any branch that cannot beat it.
+    Each cheaper way to a state gets a new node, and stack entries for the
+    old, dearer ones are skipped when popped.
+    """
+    start = problem.start()
+    budget = _Budget(problem, start, visited, max_nodes, max_memory)
+    if not budget.fits:
+        return _finish("memory_limit", Nodes(), 0)
+    visited = _visited(problem, visited, needs_index=True)
+    nodes = Nodes()
+    visited.set(problem.key(start), nodes.add(start, -1, 0))
+    stack = [0]
+    best, best_index = INF, None
+    expanded = 0
+    while stack:
+        index = stack.pop()
+        state, cost = nodes.states[index], nodes.costs[index]
+        if problem.is_goal(state):
+            if cost < best and cost <= cost_limit:
+                best, best_index = cost, index
+            continue
+        if cost >= best or cost > cost_limit:
+            continue
+        if cost > nodes.costs[visited.get(problem.key(state))]:
+            continue
+        status = budget.check(expanded, len(nodes))
+        if status:
+            break
+        expanded += 1
+        children = []
+        for successor, step in problem.successors(state):
+            g = cost + step
+            if g > cost_limit:
+                continue
+            key = problem.key(successor)
+            known = visited.get(key)
+            if known == -1 or g < nodes.costs[known]:
+                child = nodes.add(successor, index, g)
+                visited.set(key, child)
+                children.append(child)
+        children.sort(key=nodes.costs.__getitem__, reverse=True)
+        stack.extend(children)
+    else:
+        status = None
+    if best_index is not None:
+        return _finish("found", nodes, expanded, best_index)
+    return _finish(status or "exhausted", nodes, expanded)
+
+
+SEARCHES = {"bfs": bfs, "dfs": dfs, "iddfs": iddfs, "ucs": ucs, "astar": astar, "greedy": greedy,
+            "ida_star": ida_star, "branch_and_bound": branch_and_bound}
+
+
+# --- Adapters for the existing puzzles ---
+
+class RabbitLeapSearch(Problem):
+    """
+    The rabbit leap puzzle of RabbitLeapProblem.py. Keys read the cells as
+    a base-3 number (CELL_CODES digits, first cell lowest), which numbers
+    the states densely enough for the bitset backend up to about 19 cells.
+    """
+
+    def __init__(self, initial_state, goal_state):
+        from assignment1.RabbitLeapProblem import CELL_CODES, get_successors
+
+        self.get_successors = get_successors
+        self.digits = str.maketrans({cell: str(code) for cell, code in CELL_CODES.items()})
+        self.initial_state, self.goal_state = tuple(initial_state), tuple(goal_state)
+        self.key_space = 3 ** len(self.initial_state)
+
+    def start(self):
+        return self.initial_state
+
+    def is_goal(self, state):
+        return state == self.goal_state
+
+    def successors(self, state):
+        return [(successor, 1) for successor in self.get_successors(state)]
+
+    def key(self, state):
+        return int("".join(state).translate(self.digits)[::-1], 3)
+
+
+def rabbit_leap_search(initial_state, goal_state, method="bfs", visited="dict", **limits):
+    """
+    Path of states from initial_state to goal_state, or None, like
+    solve_with_bfs (method="bfs") and solve_with_dfs (method="dfs").
+    """
+    result = SEARCHES[method](RabbitLeapSearch(initial_state, goal_state), visited=visited, **limits)
+    return result.path
+
+
+class BridgeSearch(Problem):
+    """
+    The bridge crossing puzzle of BridgeCrossingSolution.py, on its
+    (start_side, end_side, umbrella_pos) states. Keys are the bitmask
+    states of solve_bridge_problem_bitmask, and the heuristic is
+    bridge_lower_bound().
+    """
+
+    def __init__(self, crossing_times):
+        from assignment1.BridgeCrossingSolution import _bridge_people, bridge_lower_bound
+
+        self.lower_bound = bridge_lower_bound
+        self.crossing_times = crossing_times
+        self.people = _bridge_people(crossing_times)
+        self.bit = {person: 1 << i for i, person in enumerate(self.people)}
+        self.times = [crossing_times[person] for person in self.people]
+        self.key_space = 1 << len(self.people) + 1
+
+    def start(self):
+        all_people = frozenset(self.crossing_times.keys())
+        return frozenset(all_people), frozenset(), 'start'
+
+    def is_goal(self, state):
+        return not state[0]
+
+    def successors(self, state):
+        # Same moves in the same order as solve_bridge_problem_bfs
+        start_side, end_side, umbrella_pos = state
+        move_from = start_side if umbrella_pos == 'start' else end_side
+        result = []
+        for num_people in [1, 2]:
+            if len(move_from) < num_people:
+                continue
+            for group in combinations(move_from, num_people):
+                group = frozenset(group)
+                trip_time = max(self.crossing_times[person] for person in group)
+                if umbrella_pos == 'start':
+                    result.append(((start_side - group, end_side | group, 'end'), trip_time))
+                else:
+                    result.append(((start_side | group, end_side - group, 'start'), trip_time))
+        return result
+
+    def heuristic(self, state):
+        return self.lower_bound(self.key(state), self.times, 2)
+
+    def key(self, state):
+        bits = sum(self.bit[person] for person in state[0])
+        return bits | (state[2] == 'end') << len(self.people)
+
+
+def bridge_search(crossing_times, time_limit, method="ucs", visited="dict", **limits):
+    """
+    (total_time, path, visited_times) like solve_bridge_problem_bfs
+    (method="ucs", or "astar") and solve_bridge_problem_dfs
+    (method="branch_and_bound"); (None, None, visited_times) if no
+    schedule fits in time_limit. method="ida_star" works too, but keeps no
+    visited states to report. The total time always matches; where several
+    schedules take that time, ucs may pick another one than the original,
+    whose queue broke ties by comparing whole paths.
+    """
+    result = SEARCHES[method](BridgeSearch(crossing_times), visited=visited, cost_limit=time_limit, **limits)
+    visited_times = result.nodes.costs_by_state() if result.nodes is not None else {}
+    if not result.found:
+        return None, None, visited_times
+    return result.cost, result.path, visited_times
+
+
+class GridSearch(Problem):
+    """
+    A grid of assignment_2.ipynb (see grid_pathfinding.Grid); states and
+    keys are flat cell ids. The heuristic is grid_pathfinding.heuristic(),
+    or with straight_line=True the squared straight-line distance that
+    best_first_search orders by.
+    """
+
+    def __init__(self, grid, start=None, goal=None, straight_line=False):
+        self.grid = grid if isinstance(grid, grid_pathfinding.Grid) else grid_pathfinding.Grid(grid)
+        self.start_cell, self.goal_cell = grid_pathfinding._endpoints(self.grid, start, goal)
+        self.goal_node = self.grid.node(self.goal_cell)
+        self.straight_line = straight_line
+        self.key_space = self.grid.size
+
+    def start(self):
+        return self.grid.node(self.start_cell)
+
+    def is_goal(self, state):
+        return state == self.goal_node
+
+    def successors(self, state):
+        return [(neighbour, 1) for neighbour in self.grid.neighbours(state)]
+
+    def heuristic(self, state):
+        x, y = divmod(state, self.grid.width)
+        dx, dy = x - self.goal_cell[0], y - self.goal_cell[1]
+        return dx * dx + dy * dy if self.straight_line else max(abs(dx), abs(dy))
+
+
+def grid_search(grid, start=None, goal=None, method="astar", visited="array", **limits):
+    """
+    (length, path) like grid_pathfinding.a_star (method="astar") and
+    best_first_search (method="greedy"); (-1, []) if there is no path.
+    """
+    problem = GridSearch(grid, start, goal, straight_line=method == "greedy")
+    if not problem.grid.is_free(problem.start_cell) or not problem.grid.is_free(problem.goal_cell):
+        return -1, []
+    result = SEARCHES[method](problem, visited=visited, **limits)
+    if not result.found:
+        return -1, []
+    return len(result.path), [problem.grid.cell(node) for node in result.path]
+
@@ -0,0 +1,122 @@
+"""
+Engine-vs-engine match runner for the Assignment 3 chess AI.
+
+Plays many games across a process pool without any display and streams
+the results as they finish: every game is appended to a PGN file and every
+move to a JSON-lines timing file (game, ply, side, move, seconds, depth,
+score). Two engines are compared by naming the modules that provide them
+(each module must offer SearchBoard, State, TranspositionTable and
+iterative_deepening, like Assignment3.py); they swap colors every game.
+
+    python selfplay.py --games 2000 --workers 32 --movetime 0.1 \\
+        --engine-a Assignment3 --engine-b my_experiment \\
+        --pgn games.pgn --timings moves.jsonl
+
+The first --random-plies moves of each game are picked at random (seeded
+by --seed and the game number) so that games differ.
+"""
+
+import argparse
+import importlib
+import json
+import random
+import sys
+import time
+
+
+def play_one_game(task):
+    """Play one game in a worker process. Returns (game_number, result, pgn_text, move_records)."""
+    import chess
+    import chess.pgn
+
+    number, white_name, black_name, movetime, max_depth, random_plies, max_plies, seed, hash_mb = task
+    engines = {chess.WHITE: importlib.import_module(white_name), chess.BLACK: importlib.import_module(black_name)}
+    tables = {color: module.TranspositionTable(hash_mb) for color, module in engines.items()}
+    states = {color: module.State(module.SearchBoard(), True) for color, module in engines.items()}
+    board = chess.Board()
+    rng = random.Random(seed * 1000003 + number)
+    records = []
+
+    while not board.is_game_over(claim_draw=True) and len(board.move_stack) < max_plies:
+        side = board.turn
+        start = time.perf_counter()
+        if len(board.move_stack) < random_plies:
+            move, score, depth = rng.choice(list(board.legal_moves)), None, 0
+        else:
+            tables[side].new_search()
+            score, move, depth = engines[side].iterative_deepening(states[side], movetime, max_depth, tables[side])
+            if move is None:
+                move = next(iter(board.legal_moves))
+        seconds = time.perf_counter() - start
+        records.append({"game": number, "ply": len(board.move_stack) + 1, "side": "white" if side else "black",
+                        "engine": engines[side].__name__, "move": move.uci(), "seconds": round(seconds, 6),
+                        "depth": depth, "score": score})
+        board.push(move)
+        for state in states.values():
+            state.makeMove(move)
+
+    result = board.result(claim_draw=True)
+    if result == "*":
+        result = "1/2-1/2"  # Adjudicated after max_plies
+    game = chess.pgn.Game.from_board(board)
+    game.headers["Event"] = "selfplay"
+    game.headers["Round"] = str(number + 1)
+    game.headers["White"] = white_name
+    game.headers["Black"] = black_name
+    game.headers["Result"] = result
+    return number, result, str(game), records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play engine-vs-engine games in parallel.")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--movetime", type=float, default=0.1, help="seconds per move")
+    parser.add_argument("--depth", type=int, default=64, help="maximum search depth per move")
+    parser.add_argument("--engine-a", default="Assignment3", help="module of the first engine")
+    parser.add_argument("--engine-b", default="Assignment3", help="module of the second engine")
+    parser.add_argument("--random-plies", type=int, default=4, help="random opening plies per game")
+    parser.add_argument("--max-plies", type=int, default=300, help="adjudicate a draw after this many plies")
+    parser.add_argument("--hash", type=int, default=16, help="transposition table size per engine in MB")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pgn", default="selfplay.pgn")
+    parser.add_argument("--timings", default="selfplay_moves.jsonl")
+    args = parser.parse_args(argv)
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    tasks = []
+    for number in range(args.games):
+        white, black = (args.engine_a, args.engine_b) if number % 2 == 0 else (args.engine_b, args.engine_a)
+        tasks.append((number, white, black, args.movetime, args.depth, args.random_plies,
+                      args.max_plies, args.seed, args.hash))
+
+    points = {args.engine_a: 0.0, args.engine_b: 0.0} if args.engine_a != args.engine_b else None
+    finished = 0
+    with open(args.pgn, "w", encoding="utf-8") as pgn_file, \
+            open(args.timings, "w", encoding="utf-8") as timing_file, \
+            ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(play_one_game, task) for task in tasks]
+        for future in as_completed(futures):
+            number, result, pgn_text, records = future.result()
+            pgn_file.write(pgn_text + "\n\n")
+            pgn_file.flush()
+            for record in records:
+                timing_file.write(json.dumps(record) + "\n")
+            timing_file.flush()
+
+            finished += 1
+            white, black = tasks[number][1], tasks[number][2]
+            if points is not None:
+                white_points = {"1-0": 1.0, "0-1": 0.0}.get(result, 0.5)
+                points[white] += white_points
+                points[black] += 1.0 - white_points
+            print(f"[{finished}/{args.games}] game {number + 1}: {white} vs {black} {result}", file=sys.stderr)
+
+    if points is not None:
+        for name, score in points.items():
+            print(f"{name}: {score:g}/{args.games}")
+
+
+if __name__ == "__main__":
+    main()
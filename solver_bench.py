@@ -0,0 +1,361 @@
+"""
+Benchmark and regression suite for all the solvers in this repository.
+
+Generates instances from a seed, runs every solver of a suite on each one
+and records wall time, nodes expanded, peak memory and solution quality:
+
+  grid    random grids over a sweep of sizes and obstacle densities;
+          grid_pathfinding's searches and the search_engine A*; quality =
+          path length in cells
+  bridge  crossing-time rosters over a sweep of sizes and time
+          distributions; the solvers of BridgeCrossingSolution.py and the
+          search_engine UCS; quality = total time
+  rabbit  the rabbit leap puzzle for a sweep of rabbit counts; quality =
+          number of moves
+  chess   positions from seeded random playouts; fixed-depth minimax and
+          PVS searches of Assignment3.py; quality = score (centipawns for
+          the side to move), reported as a change rather than a regression
+
+    python solver_bench.py run --seed 0 --json results.json [--quick] [--suites grid,bridge]
+    python solver_bench.py compare baseline.json results.json
+
+Time is the best of --repeat runs; memory is the tracemalloc peak of one
+extra run (tracing slows code down, so it is kept out of the timings).
+compare exits with status 1 when a result got slower, used more memory,
+expanded more nodes or found a worse solution than in the baseline.
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import zlib
+
+import chess
+import numpy as np
+
+import grid_pathfinding
+import search_engine
+from Assignment3 import SearchContext, State, TranspositionTable, aspiration_search, minimax_inplace
+
+# Sweeps per suite; --quick uses the second set
+SWEEPS = {
+    "grid": ({"sizes": (64, 128, 256), "densities": (0.1, 0.25, 0.35)},
+             {"sizes": (32, 64), "densities": (0.1, 0.3)}),
+    "bridge": ({"sizes": (4, 6, 8, 12, 16), "distributions": ("uniform", "skewed", "clustered")},
+               {"sizes": (4, 6, 8), "distributions": ("uniform", "clustered")}),
+    "rabbit": ({"counts": (3, 5, 7, 9)}, {"counts": (3, 5)}),
+    "chess": ({"positions": 6, "depth": 3}, {"positions": 3, "depth": 2}),
+}
+
+# Suites whose quality is a cost: higher is worse
+LOWER_IS_BETTER = {"grid", "bridge", "rabbit"}
+
+
+# --- Instance generators ---
+
+def grid_instances(seed, sizes, densities):
+    for size in sizes:
+        for density in densities:
+            rng = np.random.default_rng([seed, size, round(density * 1000)])
+            grid = (rng.random((size, size)) < density).astype(np.uint8)
+            grid[0, 0] = grid[-1, -1] = 0
+            yield f"{size}x{size}-d{density:g}", {"size": size, "density": density}, grid
+
+
+def bridge_instances(seed, sizes, distributions):
+    for size in sizes:
+        for distribution in distributions:
+            rng = np.random.default_rng([seed, size, zlib.crc32(distribution.encode())])
+            if distribution == "uniform":
+                times = rng.integers(1, 101, size)
+            elif distribution == "skewed":
+                times = 1 + np.floor(rng.exponential(10, size))  # Mostly fast people, a few very slow
+            else:
+                times = rng.choice([1, 2, 5, 10, 20, 50], size)  # Few distinct times
+            crossing_times = {f"person{i}": int(t) for i, t in enumerate(times)}
+            time_limit = 2 * sum(crossing_times.values())  # Always solvable: quality is the total time
+            yield (f"{size}-{distribution}", {"size": size, "distribution": distribution},
+                   (crossing_times, time_limit))
+
+
+def rabbit_instances(counts):
+    from assignment1.RabbitLeapProblem import rabbit_leap_states
+
+    for n in counts:
+        yield f"n{n}", {"rabbits": n}, rabbit_leap_states(n)
+
+
+def chess_instances(seed, positions):
+    rng = random.Random(seed)
+    for number in range(positions):
+        board = chess.Board()
+        for _ in range(rng.randint(8, 40)):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+        if board.is_game_over():
+            board.pop()
+        yield f"game{number}", {"fen": board.fen()}, board.fen()
+
+
+# --- Solvers: each takes an instance and returns (quality, nodes expanded or None) ---
+# The assignment1 solvers are named rather than imported here: assignment1
+# is a plain directory, imported as a namespace package when first run.
+
+def _grid_solver(function):
+    def solve(grid):
+        stats = {}
+        length, _ = function(grid, stats=stats)
+        return length, stats["expanded"]
+    return solve
+
+
+def _grid_engine(grid):
+    result = search_engine.astar(search_engine.GridSearch(grid), visited="array")
+    return (len(result.path) if result.found else -1), result.expanded
+
+
+def _bridge_solver(name):
+    def solve(instance):
+        from assignment1 import BridgeCrossingSolution
+
+        stats = {}
+        total_time, _, _ = getattr(BridgeCrossingSolution, name)(*instance, stats=stats)
+        return total_time, stats["expanded"]
+    return solve
+
+
+def _bridge_greedy(instance):
+    from assignment1.BridgeCrossingSolution import solve_bridge_problem_greedy
+
+    return solve_bridge_problem_greedy(*instance)[0], None  # Closed form: nothing is expanded
+
+
+def _bridge_engine(instance):
+    crossing_times, time_limit = instance
+    result = search_engine.ucs(search_engine.BridgeSearch(crossing_times), visited="array", cost_limit=time_limit)
+    return result.cost, result.expanded
+
+
+def _rabbit_solver(name):
+    def solve(instance):
+        from assignment1 import RabbitLeapProblem
+
+        stats = {}
+        path = getattr(RabbitLeapProblem, name)(*instance, stats=stats)
+        return (len(path) - 1 if path else None), stats["expanded"]
+    return solve
+
+
+def _rabbit_stream(instance):
+    from assignment1.RabbitLeapProblem import rabbit_leap_moves
+
+    n = len(instance[0]) // 2
+    return sum(1 for _ in rabbit_leap_moves(n)), None  # Generated move by move: nothing is expanded
+
+
+def _rabbit_engine(instance):
+    result = search_engine.bfs(search_engine.RabbitLeapSearch(*instance), visited="dict")
+    return (len(result.path) - 1 if result.found else None), result.expanded
+
+
+def _chess_solver(search):
+    def solve(instance):
+        fen, depth = instance
+        board = chess.Board(fen)
+        state = State(board, board.turn)
+        ctx = SearchContext(TranspositionTable(16))
+        score, move = search(state, depth, ctx)
+        return {"score": score, "move": move.uci() if move else None}, ctx.nodes
+    return solve
+
+
+def _minimax(state, depth, ctx):
+    score, move = minimax_inplace(state, 0, float("-inf"), float("inf"), state.player, depth, ctx.tt, ctx)
+    return round(score * 100) * (1 if state.player else -1), move
+
+
+# Solver name -> (function, largest instance it is run on, or None for all)
+SOLVERS = {
+    "grid": {
+        "a_star": (_grid_solver(grid_pathfinding.a_star), None),
+        "best_first_search": (_grid_solver(grid_pathfinding.best_first_search), None),
+        "jump_point_search": (_grid_solver(grid_pathfinding.jump_point_search), None),
+        "engine_astar": (_grid_engine, None),
+    },
+    "bridge": {
+        "bfs": (_bridge_solver("solve_bridge_problem_bfs"), 6),
+        "dfs": (_bridge_solver("solve_bridge_problem_dfs"), 6),
+        "bitmask": (_bridge_solver("solve_bridge_problem_bitmask"), None),
+        "astar": (_bridge_solver("solve_bridge_problem_astar"), 12),
+        "greedy": (_bridge_greedy, None),
+        "engine_ucs": (_bridge_engine, 10),
+    },
+    "rabbit": {
+        "bfs": (_rabbit_solver("solve_with_bfs"), None),
+        "dfs": (_rabbit_solver("solve_with_dfs"), None),
+        "bidirectional_bfs": (_rabbit_solver("solve_with_bidirectional_bfs"), None),
+        "move_stream": (_rabbit_stream, None),
+        "engine_bfs": (_rabbit_engine, None),
+    },
+    "chess": {
+        "minimax_inplace": (_chess_solver(_minimax), None),
+        "pvs": (_chess_solver(lambda state, depth, ctx: aspiration_search(state, depth, ctx)), None),
+    },
+}
+
+
+def instances(suite, seed, quick):
+    sweep = SWEEPS[suite][1 if quick else 0]
+    if suite == "grid":
+        yield from grid_instances(seed, sweep["sizes"], sweep["densities"])
+    elif suite == "bridge":
+        yield from bridge_instances(seed, sweep["sizes"], sweep["distributions"])
+    elif suite == "rabbit":
+        yield from rabbit_instances(sweep["counts"])
+    else:
+        for name, params, fen in chess_instances(seed, sweep["positions"]):
+            yield name, params, (fen, sweep["depth"])
+
+
+def measure(function, instance, repeat):
+    """Best wall time of repeat calls, the tracemalloc peak of one more call, and the call's result."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(instance)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function(instance)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak, result
+
+
+def run_suites(suites, seed, quick, repeat, log=None):
+    rows = []
+    for suite in suites:
+        for name, params, instance in instances(suite, seed, quick):
+            size = params.get("size", params.get("rabbits"))
+            for solver, (function, largest) in SOLVERS[suite].items():
+                if largest is not None and size is not None and size > largest:
+                    continue
+                seconds, peak, (quality, nodes) = measure(function, instance, repeat)
+                row = {"suite": suite, "instance": name, "solver": solver, "seconds": seconds,
+                       "peak_kb": peak / 1024, "nodes": nodes, "quality": quality, "params": params}
+                rows.append(row)
+                if log:
+                    log(row)
+    return rows
+
+
+# --- Comparison against a baseline ---
+
+def _quality_regression(suite, base, current):
+    # "worse", "changed" or None
+    if base == current:
+        return None
+    if suite not in LOWER_IS_BETTER:
+        return "changed"
+    if base in (None, -1):
+        return None  # No solution before; any solution now is no regression
+    if current in (None, -1) or current > base:
+        return "worse"
+    return None
+
+
+def compare(baseline, current, time_tolerance=0.25, memory_tolerance=0.25, min_seconds=0.005, min_kb=64):
+    """
+    Findings for every result of baseline, matched to current by suite,
+    instance and solver: list of (key, problem, base value, current value).
+    problem is one of "slower", "memory", "nodes", "quality worse",
+    "quality changed" (not a regression) or "missing".
+    """
+    now = {(row["suite"], row["instance"], row["solver"]): row for row in current["results"]}
+    findings = []
+    for row in baseline["results"]:
+        key = (row["suite"], row["instance"], row["solver"])
+        if key not in now:
+            findings.append((key, "missing", None, None))
+            continue
+        new = now[key]
+        if new["seconds"] > row["seconds"] * (1 + time_tolerance) and new["seconds"] - row["seconds"] > min_seconds:
+            findings.append((key, "slower", row["seconds"], new["seconds"]))
+        if new["peak_kb"] > row["peak_kb"] * (1 + memory_tolerance) and new["peak_kb"] - row["peak_kb"] > min_kb:
+            findings.append((key, "memory", row["peak_kb"], new["peak_kb"]))
+        if row["nodes"] is not None and new["nodes"] is not None and new["nodes"] > row["nodes"]:
+            findings.append((key, "nodes", row["nodes"], new["nodes"]))
+        quality = _quality_regression(row["suite"], row["quality"], new["quality"])
+        if quality:
+            findings.append((key, "quality " + quality, row["quality"], new["quality"]))
+    return findings
+
+
+def print_row(row):
+    nodes = "-" if row["nodes"] is None else row["nodes"]
+    print(f"{row['suite']:>7} {row['instance']:>18} {row['solver']:>18} {row['seconds'] * 1000:>11.2f} ms "
+          f"{row['peak_kb']:>10.0f} KB {str(nodes):>9} nodes  quality {row['quality']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the solvers and compare runs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="run the benchmarks")
+    run.add_argument("--suites", default=",".join(SOLVERS), help="comma-separated, from " + ", ".join(SOLVERS))
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--quick", action="store_true", help="smaller sweeps")
+    run.add_argument("--repeat", type=int, default=3, help="timed runs per result (the best counts)")
+    run.add_argument("--json", help="write the results to this file")
+    check = commands.add_parser("compare", help="flag regressions of a run against a baseline run")
+    check.add_argument("baseline")
+    check.add_argument("current")
+    check.add_argument("--time-tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    check.add_argument("--memory-tolerance", type=float, default=0.25, help="allowed relative memory growth")
+    check.add_argument("--min-seconds", type=float, default=0.005, help="ignore slowdowns below this")
+    check.add_argument("--min-kb", type=float, default=64, help="ignore memory growth below this")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        suites = [suite for suite in args.suites.split(",") if suite]
+        unknown = set(suites) - set(SOLVERS)
+        if unknown:
+            parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+        rows = run_suites(suites, args.seed, args.quick, args.repeat, log=print_row)
+        results = {"meta": {"seed": args.seed, "quick": args.quick, "repeat": args.repeat,
+                            "python": platform.python_version(), "created": time.strftime("%Y-%m-%dT%H:%M:%S")},
+                   "results": rows}
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as handle:
+                json.dump(results, handle, indent=2)
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as handle:
+        baseline = json.load(handle)
+    with open(args.current, encoding="utf-8") as handle:
+        current = json.load(handle)
+    findings = compare(baseline, current, args.time_tolerance, args.memory_tolerance,
+                       args.min_seconds, args.min_kb)
+    regressions = 0
+    for (suite, instance, solver), problem, before, after in findings:
+        regressions += problem != "quality changed"
+        if problem == "missing":
+            print(f"{problem:>16}  {suite}/{instance}/{solver}")
+        elif problem == "slower":
+            print(f"{problem:>16}  {suite}/{instance}/{solver}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms")
+        elif problem == "memory":
+            print(f"{problem:>16}  {suite}/{instance}/{solver}: {before:.0f} KB -> {after:.0f} KB")
+        else:
+            print(f"{problem:>16}  {suite}/{instance}/{solver}: {before} -> {after}")
+    print(f"{regressions} regression(s) in {len(baseline['results'])} results")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
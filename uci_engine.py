@@ -0,0 +1,251 @@
+"""
+Headless UCI front end for the Assignment 3 chess AI.
+
+Speaks the Universal Chess Interface on stdin/stdout, so the engine can be
+driven by a chess GUI, cutechess-cli or a script instead of play_game's
+pygame window and input() prompt:
+
+    python uci_engine.py
+
+Supported commands: uci, isready, setoption (Hash, Threads, OwnBook,
+BookFile, BatchEval), ucinewgame, position [startpos | fen ...] [moves ...],
+go [movetime | wtime/btime/winc/binc/movestogo | depth | infinite | ponder],
+stop, ponderhit, quit. Nothing here imports pygame.
+
+In "go infinite" and "go ponder" the bestmove is held back until "stop"
+(or "ponderhit"), even if the search ends earlier, e.g. on finding a mate.
+After "ponderhit" the pondering search becomes a normal one: it gets the
+time budget of the clock fields sent with "go ponder", counted from then.
+"""
+
+import os
+import sys
+import threading
+
+import chess
+
+import Assignment3 as engine
+from opening_book import OpeningBook
+
+ENGINE_NAME = "Assignment3 Minimax"
+MOVE_OVERHEAD = 0.05  # Seconds kept back per move for I/O
+FOREVER = 10 ** 9  # Time budget for "go infinite" and "go depth"
+
+
+def time_budget(board, params):
+    # Seconds to spend on this move, from the clock fields of a "go" command
+    if "movetime" in params:
+        return max(0.01, params["movetime"] / 1000 - MOVE_OVERHEAD)
+    if "infinite" in params or "depth" in params:
+        return FOREVER
+    side = "w" if board.turn == chess.WHITE else "b"
+    if side + "time" not in params:
+        return 1.0
+    remaining = params[side + "time"] / 1000
+    increment = params.get(side + "inc", 0) / 1000
+    moves_to_go = params.get("movestogo", 30)
+    budget = remaining / max(moves_to_go, 1) + 0.8 * increment
+    return max(0.01, min(budget, remaining / 2) - MOVE_OVERHEAD)
+
+
+def parse_go(tokens):
+    params = {}
+    index = 0
+    while index < len(tokens):
+        name = tokens[index]
+        if name in ("infinite", "ponder"):
+            params[name] = True
+            index += 1
+        elif index + 1 < len(tokens):
+            try:
+                params[name] = int(tokens[index + 1])
+            except ValueError:
+                pass
+            index += 2
+        else:
+            index += 1
+    return params
+
+
+class UciEngine:
+    def __init__(self, output=sys.stdout):
+        self.output = output
+        self.hash_mb = 64
+        self.threads = 1
+        self.own_book = True
+        self.batch_eval = False  # Score leaf children in NumPy batches (SearchContext.batch_leaves)
+        self.book_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+        self.tt = engine.TranspositionTable(self.hash_mb)
+        self.board = engine.SearchBoard()
+        self.executor = None
+        self._book = None
+        self._stop = threading.Event()
+        self._release = threading.Event()  # Set when bestmove may be sent
+        self._timer = None  # Ends a pondering search after ponderhit
+        self._params = {}
+        self._search = None
+
+    def send(self, line):
+        self.output.write(line + "\n")
+        self.output.flush()
+
+    def book(self):
+        if self._book is None and self.own_book and os.path.exists(self.book_path):
+            self._book = OpeningBook(self.book_path)
+        return self._book
+
+    def set_option(self, name, value):
+        name = name.lower()
+        if name == "hash":
+            self.hash_mb = max(1, int(value))
+            self.tt = engine.TranspositionTable(self.hash_mb)
+        elif name == "threads":
+            self.threads = max(1, int(value))
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+            if self.threads > 1:
+                from concurrent.futures import ProcessPoolExecutor
+
+                self.executor = ProcessPoolExecutor(max_workers=self.threads)
+        elif name == "ownbook":
+            self.own_book = value.lower() == "true"
+        elif name == "batcheval":
+            self.batch_eval = value.lower() == "true"
+        elif name == "bookfile":
+            if self._book is not None:
+                self._book.close()
+                self._book = None
+            self.book_path = value
+
+    def set_position(self, tokens):
+        if not tokens:
+            return
+        if tokens[0] == "startpos":
+            board = engine.SearchBoard()
+            rest = tokens[1:]
+        elif tokens[0] == "fen":
+            fen_end = tokens.index("moves") if "moves" in tokens else len(tokens)
+            board = engine.SearchBoard(" ".join(tokens[1:fen_end]))
+            rest = tokens[fen_end:]
+        else:
+            return
+        if rest and rest[0] == "moves":
+            for uci in rest[1:]:
+                board.push_uci(uci)
+        self.board = board
+
+    def go(self, params):
+        self.stop()
+        self._stop.clear()
+        self._release.clear()
+        if "infinite" not in params and "ponder" not in params:
+            self._release.set()
+        self._params = params
+        board = self.board.copy()
+        self._search = threading.Thread(target=self._think, args=(board, params), daemon=True)
+        self._search.start()
+
+    def _think(self, board, params):
+        book = self.book()
+        move = book.choose(board) if book is not None else None
+        if move is None:
+            state = engine.State(board, board.turn)
+            self.tt.new_search()
+            budget = FOREVER if "ponder" in params else time_budget(board, params)
+            _, move, _ = engine.iterative_deepening(
+                state, budget, params.get("depth", 64), self.tt,
+                self.executor, stop=self._stop, on_iteration=lambda stats: self.report(board, stats),
+                batch_leaves=self.batch_eval)
+        if move is None:
+            # Stopped before the first iteration finished, or no legal move
+            move = next(iter(board.legal_moves), None)
+        self._release.wait()
+        self.send(f"bestmove {move.uci() if move else '0000'}")
+
+    def report(self, board, stats):
+        # One "info" line per finished iteration
+        iteration = stats.iterations[-1]
+        centipawns = round(iteration["score"] * 100) * (1 if board.turn == chess.WHITE else -1)
+        pv = " ".join(move.uci() for move in iteration["pv"])
+        self.send(f"info depth {iteration['depth']} score cp {centipawns} nodes {stats.nodes} "
+                  f"nps {int(stats.nps)} time {int(stats.seconds * 1000)} pv {pv}")
+
+    def wait(self):
+        if self._search is not None:
+            self._search.join()
+            self._search = None
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._stop.set()
+        self._release.set()
+        self.wait()
+
+    def ponder_hit(self):
+        # The opponent played the pondered move: search on as a timed search
+        if self._search is None or self._release.is_set():
+            return
+        params = dict(self._params)
+        params.pop("ponder")
+        if "infinite" not in params:
+            self._timer = threading.Timer(time_budget(self.board, params), self._stop.set)
+            self._timer.daemon = True
+            self._timer.start()
+            self._release.set()
+
+    def handle(self, line):
+        """Process one command line. Returns False after "quit"."""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        if command == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send("id author Assignment 3")
+            self.send(f"option name Hash type spin default {self.hash_mb} min 1 max 65536")
+            self.send("option name Threads type spin default 1 min 1 max 512")
+            self.send("option name OwnBook type check default true")
+            self.send(f"option name BookFile type string default {self.book_path}")
+            self.send("option name BatchEval type check default false")
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "setoption" and "name" in args:
+            value_at = args.index("value") if "value" in args else len(args)
+            name = " ".join(args[args.index("name") + 1:value_at])
+            self.set_option(name, " ".join(args[value_at + 1:]))
+        elif command == "ucinewgame":
+            self.stop()
+            self.tt.clear()
+            self.board = engine.SearchBoard()
+        elif command == "position":
+            self.stop()
+            self.set_position(args)
+        elif command == "go":
+            self.go(parse_go(args))
+        elif command == "stop":
+            self.stop()
+        elif command == "ponderhit":
+            self.ponder_hit()
+        elif command == "quit":
+            self.stop()
+            if self.executor is not None:
+                self.executor.shutdown()
+            return False
+        return True
+
+
+def main():
+    uci = UciEngine()
+    for line in sys.stdin:
+        if not uci.handle(line):
+            break
+    else:
+        uci.stop()
+
+
+if __name__ == "__main__":
+    main()